@@ -0,0 +1,171 @@
+"""
+Control de admisión del formulario de registro.
+
+Cuando el enlace circula por un grupo de WhatsApp llegan decenas de envíos
+en el mismo minuto. En vez de que todos compitan a la vez por el lock del
+store:
+
+- AdmissionController deja entrar como mucho `workers` registros a la vez
+  al camino de escritura (asignación + guardado); el resto espera en una
+  cola FIFO y cada sesión ve su puesto ("Eres el #3 en la fila")
+- si la cola está llena o la espera supera `timeout`, el envío se rechaza
+  con un mensaje para reintentar en lugar de dejar la página colgada
+- TokenBucket, uno por sesión, absorbe dobles clics y reenvíos seguidos
+  antes de que ocupen un puesto en la cola; un envío que no llega a
+  registrarse (rechazado, o interrumpido por el rerun de otro clic mientras
+  esperaba) devuelve su ficha, así el reintento no se pierde
+
+La espera en cola se mide como la fase registro.espera_cola (ver metrics.py).
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import streamlit as st
+
+from assignment import RegistroError
+from events import EVENTO_DEFAULT
+from metrics import TRACER
+
+
+class ColaLlena(RegistroError):
+    """La cola de registro está llena o la espera venció."""
+
+
+class TokenBucket:
+    """
+    Cubeta de fichas de una sesión.
+    - burst: envíos que se aceptan seguidos
+    - refill_s: segundos para reponer una ficha
+    """
+
+    def __init__(self, burst: int = 1, refill_s: float = 5.0):
+        self.burst = burst
+        self.refill_s = refill_s
+        self._fichas = float(burst)
+        self._t = time.monotonic()
+
+    def _reponer(self):
+        ahora = time.monotonic()
+        self._fichas = min(self.burst, self._fichas + (ahora - self._t) / self.refill_s)
+        self._t = ahora
+
+    def take(self) -> bool:
+        """Gasta una ficha; False si la sesión envía más rápido de lo permitido."""
+        self._reponer()
+        if self._fichas < 1:
+            return False
+        self._fichas -= 1
+        return True
+
+    def refund(self):
+        """Devuelve la ficha de un envío que no llegó a registrarse."""
+        self._fichas = min(self.burst, self._fichas + 1)
+
+    def wait_time(self) -> int:
+        """Segundos (redondeados hacia arriba) hasta la siguiente ficha."""
+        self._reponer()
+        return math.ceil(max(0.0, 1 - self._fichas) * self.refill_s)
+
+
+class AdmissionController:
+    """
+    Plazas limitadas para el camino de escritura, con cola FIFO.
+    - workers: registros que se procesan a la vez
+    - max_queue: envíos en espera como máximo; el siguiente se rechaza
+    - timeout: segundos de espera en cola antes de rechazar
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 100, timeout: float = 60.0):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._active = 0
+
+        self.admitted = 0
+        self.rejected = 0
+
+    @contextmanager
+    def admit(self, on_wait=None):
+        """
+        Espera turno y ocupa una plaza mientras dura el bloque.
+        - on_wait(puesto): se llama fuera del lock cada vez que cambia el puesto
+          en la fila (1 = el siguiente en entrar), p. ej. para pintarlo
+        Lanza ColaLlena si no hay sitio en la cola o se agota el tiempo.
+        """
+        turno = object()
+        t0 = time.perf_counter()
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                raise ColaLlena("Hay demasiadas personas registrándose. Intenta de nuevo en un minuto.")
+            self._queue.append(turno)
+
+        try:
+            visto = None
+            while True:
+                with self._cond:
+                    if self._queue[0] is turno and self._active < self.workers:
+                        self._queue.popleft()
+                        self._active += 1
+                        self.admitted += 1
+                        # puede quedar otra plaza libre para el siguiente
+                        self._cond.notify_all()
+                        break
+                    puesto = self._queue.index(turno) + 1
+                    restante = self.timeout - (time.perf_counter() - t0)
+                    if restante <= 0:
+                        raise ColaLlena("La espera se alargó demasiado. Intenta de nuevo en un minuto.")
+                    if puesto == visto or on_wait is None:
+                        self._cond.wait(min(restante, 0.5))
+                        continue
+                visto = puesto
+                on_wait(puesto)
+        except BaseException as e:
+            # rechazo, o la sesión se cerró/reinició mientras esperaba: liberar el puesto
+            with self._cond:
+                self._queue.remove(turno)
+                self.rejected += isinstance(e, ColaLlena)
+                self._cond.notify_all()
+            TRACER.record("registro.espera_cola", time.perf_counter() - t0, ok=False)
+            raise
+        TRACER.record("registro.espera_cola", time.perf_counter() - t0)
+
+        try:
+            yield self
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def status(self) -> dict:
+        with self._cond:
+            return {
+                "en_cola": len(self._queue),
+                "activos": self._active,
+                "admitidos": self.admitted,
+                "rechazados": self.rejected,
+            }
+
+
+@st.cache_resource
+def get_admission(workers: int = 2, max_queue: int = 100, timeout: float = 60.0,
+                  evento: str = EVENTO_DEFAULT) -> AdmissionController:
+    """
+    Controlador único por configuración y evento, compartido por todas las sesiones.
+    Cada evento escribe en su propio store, así que también tiene su propia cola.
+    """
+    return AdmissionController(workers, max_queue, timeout)
+
+
+def session_bucket(burst: int = 1, refill_s: float = 5.0) -> TokenBucket:
+    """Cubeta de fichas de la sesión actual (vive en st.session_state)."""
+    bucket = st.session_state.get("_registro_bucket")
+    if bucket is None or (bucket.burst, bucket.refill_s) != (burst, refill_s):
+        bucket = st.session_state["_registro_bucket"] = TokenBucket(burst, refill_s)
+    return bucket
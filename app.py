@@ -1,111 +1,69 @@
-import streamlit as st
-import pandas as pd
-import random
-from datetime import datetime
 import os
-import io
-from PIL import Image
-import matplotlib.pyplot as plt
-import time
-import numpy as np
-from PIL import Image, ImageDraw, ImageFont
-
-import json
+from datetime import datetime
+
+import streamlit as st
 from streamlit.components.v1 import html as st_html
-import time
-from github import Github
-import altair as alt
 
-import smtplib
-from email.message import EmailMessage
+from admission import get_admission, session_bucket
+from assignment import RegistroError, get_assigner
+from bulk_import import read_guest_file
+from cards import CACHE_DIR as CARDS_DIR, build_cards, export_pdf, export_zip
+from dashboard import dashboard_data
+from events import (
+    EVENTO_DEFAULT, event_asset, event_id, event_name, evento_config, repo_dir, repo_path,
+    secrets_section
+)
+from github_pull import API_URL, sync_on_startup
+from github_sync import REPO_NAME, get_sync_worker
+from images import ANCHO_BANNER, optimized_map, optimized_path
+from metrics import TRACER, span
+from notifications import get_outbox
+from storage import POR_PAGINA, canonical_phone, format_fecha, get_store
 
 # --- CONFIGURACIÓN DE GITHUB ---
 def push_file_to_github(
     local_path: str,
-    repo_name: str = "Gabri3l756/BabyShower",
+    repo_name: str = REPO_NAME,
     repo_path: str = None,
-    message: str = None
+    message: str = None,
+    prepare=None
 ):
     """
-    Sube o actualiza cualquier fichero de tu app al repo de GitHub.
+    Encola la subida o actualización de cualquier fichero de tu app al repo de GitHub.
+    El commit lo hace un worker en segundo plano, así el invitado no espera a la API.
     - local_path: ruta local (e.g. csv_file o cat_file)
     - repo_path: ruta en el repo (por defecto, toma el nombre del fichero)
     - message: mensaje de commit (por defecto, '🤖 Actualizar <repo_path>')
+    - prepare: función a ejecutar en el worker antes de leer el fichero
     """
     token = st.secrets["general"]["GITHUB_TOKEN"]
-    gh    = Github(token)
-    repo  = gh.get_repo(repo_name)
+    get_sync_worker(token, repo_name, evento).enqueue(local_path, repo_path, message, prepare)
 
-    # Determinar repo_path y message si no vienen
-    if repo_path is None:
-        repo_path = os.path.basename(local_path)
-    if message is None:
-        message = f"🤖 Actualizar {repo_path}"
-
-    # Leer contenido local
-    with open(local_path, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    try:
-        # Si ya existe, lo actualiza
-        contents = repo.get_contents(repo_path, ref="main")
-        repo.update_file(
-            path=repo_path,
-            message=message,
-            content=content,
-            sha=contents.sha,
-            branch="main"
-        )
-    except Exception:
-        # Si no existe, lo crea
-        repo.create_file(
-            path=repo_path,
-            message=message,
-            content=content,
-            branch="main"
-        )
+def hosts_outbox():
+    """
+    Bandeja de salida configurada con los secrets de [email]. Cada evento
+    tiene la suya; HOSTS en [eventos.<id>] cambia los destinatarios.
+    """
+    secrets = st.secrets["email"]
+    return get_outbox(
+        smtp_server  = secrets["SMTP_SERVER"],
+        smtp_port    = int(secrets["SMTP_PORT"]),
+        user         = secrets["USER"],
+        password     = secrets["PASSWORD"],
+        hosts        = tuple(evento_config(evento).get("HOSTS", secrets["HOSTS"])),
+        batch_window = float(secrets.get("BATCH_WINDOW_S", 0)),
+        starttls     = bool(secrets.get("STARTTLS", True)),
+        evento       = None if evento == EVENTO_DEFAULT else event_name(evento),
+    )
 
 def notify_hosts(nueva_registro: dict):
     """
-    Envía un correo a los anfitriones con los datos de la nueva inscripción.
+    Encola un correo a los anfitriones con los datos de la nueva inscripción.
+    El envío lo hace la bandeja de salida en segundo plano, con una conexión SMTP
+    persistente; con BATCH_WINDOW_S en los secrets se agrupan en un resumen.
     nueva_registro debe tener llaves: Nombre, Celular, Categoría, Fecha, Acompañantes
     """
-    secrets = st.secrets["email"]
-    smtp_server = secrets["SMTP_SERVER"]
-    smtp_port   = secrets["SMTP_PORT"]
-    user        = secrets["USER"]
-    password    = secrets["PASSWORD"]
-    hosts       = secrets["HOSTS"]
-
-    # Construir el mensaje
-    msg = EmailMessage()
-    msg["Subject"] = f"Nuevo registro: {nueva_registro['Nombre']}"
-    msg["From"]    = user
-    msg["To"]      = ", ".join(hosts)
-    body = f"""
-    ¡Hola!
-
-    Se ha registrado un nuevo invitado:
-
-      • Nombre      : {nueva_registro['Nombre']}
-      • Celular     : {nueva_registro['Celular']}
-      • Categoría   : {nueva_registro['Categoría']}
-      • Acompañantes: {nueva_registro['Acompañantes']}
-      • Fecha       : {nueva_registro['Fecha']}
-
-    ¡Saludos!
-    """
-    msg.set_content(body)
-
-    # Enviar
-    try:
-        with smtplib.SMTP(smtp_server, smtp_port) as smtp:
-            smtp.ehlo()
-            smtp.starttls()
-            smtp.login(user, password)
-            smtp.send_message(msg)
-    except Exception as e:
-        st.error(f"No se pudo notificar a los anfitriones: {e}")
+    hosts_outbox().enqueue(nueva_registro)
 
 
 # Mapeo de meses a español
@@ -118,6 +76,9 @@ MESES = {
 # clave admin
 ADMIN_PWD = "7560"
 
+# Opciones como máximo en el selector de Gestionar Invitado
+MAX_OPCIONES_ADMIN = 50
+
 # --- CONFIGURACIÓN DE LA PÁGINA ---
 st.set_page_config(
     page_title="Baby Shower 🎀",
@@ -147,53 +108,89 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Ruta para persistir los cupos
-cat_file = "categorias.csv"
-
-# CARGAR O CREAR CATEGORÍAS CON CUPO
-if os.path.exists(cat_file):
-    df_cat = pd.read_csv(cat_file)
-    categorias = dict(zip(df_cat["Categoría"], df_cat["Cupo total"]))
-else:
-    categorias = {
-        "Vestimenta": 5,
-        "Higiene y Baño": 5,
-        "Alimentación": 5,
-        "Juguetes y Estimulación": 5,
-        "Cambio de Pañal": 5,
-        "Hora de Dormir": 5
-    }
-    # guardar inicial
-    pd.DataFrame([
-        {"Categoría": c, "Cupo total": categorias[c]}
-        for c in categorias
-    ]).to_csv(cat_file, index=False)
-
-# Diccionario de imágenes por categoría
-img_map = {
+# --- EVENTO (?evento=<id> en la URL; ver events.py) ---
+evento = event_id(st.query_params.get("evento"))
+if evento is None:
+    st.error("🔎 Este evento no existe. Revisa el enlace que te compartieron.")
+    st.stop()
+
+# cada evento puede tener su propia clave de admin
+ADMIN_PWD = evento_config(evento).get("ADMIN_PWD", ADMIN_PWD)
+
+# --- INSTRUMENTACIÓN ([metrics] ENABLED / JSON_LOGS en los secrets) ---
+_metrics = secrets_section("metrics")
+TRACER.configure(
+    enabled   = bool(_metrics.get("ENABLED", True)),
+    json_logs = bool(_metrics.get("JSON_LOGS", False)),
+)
+
+# --- CONTROL DE ADMISIÓN DEL REGISTRO ([admission] en los secrets) ---
+_admission = secrets_section("admission")
+admision = get_admission(
+    workers   = int(_admission.get("WORKERS", 2)),
+    max_queue = int(_admission.get("MAX_QUEUE", 100)),
+    timeout   = float(_admission.get("TIMEOUT_S", 60)),
+    evento    = evento,
+)
+
+# --- DASHBOARD EN VIVO ([dashboard] REFRESH_S en los secrets; 0 = sin refresco) ---
+REFRESH_S = float(secrets_section("dashboard").get("REFRESH_S", 10))
+
+def registro_bucket():
+    """Envíos seguidos permitidos por sesión (BURST) y segundos para reponer uno (REFILL_S)."""
+    return session_bucket(
+        burst    = int(_admission.get("BURST", 1)),
+        refill_s = float(_admission.get("REFILL_S", 5)),
+    )
+
+# --- DATOS (cacheados entre sesiones y reruns; solo los del evento pedido) ---
+store = get_store(evento)
+csv_file = store.csv_file
+cat_file = store.cat_file
+csv_repo = repo_path(evento, "inscritos.csv")
+cat_repo = repo_path(evento, "categorias.csv")
+
+# --- SINCRONIZACIÓN DE ARRANQUE ([general] STARTUP_SYNC / GITHUB_API_URL) ---
+def push_estado_fusionado():
+    """Sube lo que la fusión de arranque tiene y GitHub no (un solo commit, ver github_sync)."""
+    push_file_to_github(local_path=cat_file, repo_path=cat_repo,
+                        message="🤖 Actualizar cupos")
+    push_file_to_github(local_path=csv_file, repo_path=csv_repo,
+                        message="🤖 Actualizar lista de invitados", prepare=store.sync_csv)
+
+_github = secrets_section("general")
+sync_arranque = None
+if _github.get("GITHUB_TOKEN") and _github.get("STARTUP_SYNC", True):
+    # una vez por proceso (cache_resource): las copias de GitHub se fusionan con las locales
+    sync_arranque = sync_on_startup(
+        store, _github["GITHUB_TOKEN"], REPO_NAME,
+        api_url=_github.get("GITHUB_API_URL", API_URL), _push=push_estado_fusionado,
+        repo_dir=repo_dir(evento)
+    )
+
+# Diccionario de imágenes por categoría (variantes optimizadas a 400px);
+# las que el evento tenga en eventos/<id>/assets/ sustituyen a las compartidas
+img_map = optimized_map({cat: event_asset(evento, path) for cat, path in {
     "Vestimenta": "assets/vestimenta.png",
     "Higiene y Baño": "assets/higieneyba.png",
     "Alimentación": "assets/alimentacion.png",
     "Juguetes y Estimulación": "assets/juguetes.png",
     "Cambio de Pañal": "assets/cambiopa.png",
     "Hora de Dormir": "assets/dormir.png"
-}
-
-# --- CARGAR O CREAR CSV ---
-csv_file = "inscritos.csv"
-if os.path.exists(csv_file):
-    inscritos = pd.read_csv(csv_file)
-else:
-    inscritos = pd.DataFrame(columns=["Nombre", "Celular", "Categoría", "Fecha", "Acompañantes"])
+}.items()})
+icono_default = optimized_path(event_asset(evento, "assets/baby_icon.png"))
 
-st.image("assets/banner.png", use_container_width=True)
+st.image(optimized_path(event_asset(evento, "assets/banner.png"), ANCHO_BANNER), use_container_width=True)
 
-# --- BARRA DE NAVEGACIÓN EN PESTAÑAS ---
-tab1, tab2, tab3, tab4 = st.tabs(["📝 Registro", "🔍 Consultar", "📊 Análisis", "⚙️ Configuración"])
+# --- BARRA DE NAVEGACIÓN ---
+# Solo se ejecuta la sección activa (st.tabs ejecutaba las cuatro en cada rerun)
+SECCIONES = ["📝 Registro", "🔍 Consultar", "📊 Análisis", "⚙️ Configuración"]
+seccion = st.radio(
+    "Sección", SECCIONES, key="seccion", horizontal=True, label_visibility="collapsed"
+)
 
 # --- CONSTANTES DE ANIMACIÓN ---
 ANIMATION_DURATION_MS = 6000
-ANIMATION_DURATION_S  = ANIMATION_DURATION_MS / 1000 + 0.1  # segundos + buffer
 
 # --- Función para generar el anillo 3D horizontal con duración parametrizada ---
 def build_wheel_3d_vertical(cats, elegido, dur=6000):
@@ -263,8 +260,9 @@ def build_wheel_3d_vertical(cats, elegido, dur=6000):
   }}
 </style>
 '''
-# --- PESTAÑA 1: REGISTRO ---
-with tab1:
+# --- SECCIÓN 1: REGISTRO ---
+@st.fragment
+def seccion_registro():
     st.subheader("🎁 Registro y asignación de Categoría")
 
     # ---------- FORMULARIO ----------
@@ -283,113 +281,53 @@ with tab1:
         if not celular.isdigit() or len(celular) != 10:
             st.warning("Ingresa un número válido de 10 dígitos (sin +57 ni espacios).")
             st.stop()
-        if celular in inscritos["Celular"].astype(str).values:
-            st.error("Este número ya ha sido registrado.")
+        # 2) Dobles clics y reenvíos seguidos no llegan a la cola
+        bucket = registro_bucket()
+        if not bucket.take():
+            st.warning(f"Ya recibimos tu envío. Espera {bucket.wait_time()} segundos antes de intentarlo de nuevo.")
             st.stop()
-
-        # 2) Verificar categorías con cupo disponible
-        conteo = inscritos["Categoría"].value_counts().to_dict()
-        disponibles = [cat for cat, cupo in categorias.items() if conteo.get(cat, 0) < cupo]
-        if not disponibles:
-            st.error("Ya se asignaron todas las categorías disponibles.")
+        # 3) Turno en la cola de registro; dentro, elegir categoría con cupo y guardar (bajo lock)
+        fila = st.empty()
+        try:
+            with admision.admit(on_wait=lambda puesto: fila.info(
+                f"⏳ Hay muchas personas registrándose. Eres el **#{puesto}** en la fila…"
+            )):
+                fila.empty()
+                with span("registro.asignacion"):
+                    nueva, disponibles = get_assigner(evento).register(nombre, celular, acompañantes)
+        except BaseException as e:
+            # rechazado, o interrumpido por el rerun de otro clic antes de guardar
+            bucket.refund()
+            if not isinstance(e, RegistroError):
+                raise
+            fila.empty()
+            st.error(str(e))
             st.stop()
+        asignada = nueva["Categoría"]
 
-        # 3) Elegir la categoría definitiva
-        asignada = random.choice(disponibles)
-
-        # mapping de nombre->ruta de imagen si quieres mostrar íconos
-        img_map = {
-            "Vestimenta": "assets/vestimenta.png",
-            "Higiene y Baño": "assets/higieneyba.png",
-            "Alimentación": "assets/alimentacion.png",
-            "Juguetes y Estimulación": "assets/juguetes.png",
-            "Cambio de Pañal": "assets/cambiopa.png",
-            "Hora de Dormir": "assets/dormir.png"
-        }
-
-        # placeholder para la animación
-        ph = st.empty()
-
-        # número de ciclos (vueltas completas sobre la lista)
-        vueltas = 5
-        # velocidad de “scroll” en segundos
-        delay = 0.1
-
-        # animación: desliza cada nombre verticalmente
-        for _ in range(vueltas):
-            for cat in disponibles:
-                ph.markdown(f"""
-        <div style="
-        height:150px;
-        display:flex;
-        align-items:center;
-        justify-content:center;
-        font-size:2rem;
-        color:#555;
-        border:2px solid #eee;
-        border-radius:8px;
-        background:#fafafa;
-        ">
-        {cat}
-        </div>
-        """, unsafe_allow_html=True)
-                time.sleep(delay)
-
-        # un “paso” final para aterrizar sobre la categoría asignada
-        # calculamos cuántos elementos saltamos hasta llegar a `asignada`
-        start_idx = 0  # asumimos que empieza en disponibles[0] al iniciar
-        offset = disponibles.index(asignada)
-        for i in range(offset+1):
-            cat = disponibles[i]
-            ph.markdown(f"""
-        <div style="
-        height:150px;
-        display:flex;
-        align-items:center;
-        justify-content:center;
-        font-size:2rem;
-        font-weight:bold;
-        color:#222;
-        border:3px solid #8bc34a;
-        border-radius:8px;
-        background:#e8f5e9;
-        ">
-        {cat}
-        </div>
-        """, unsafe_allow_html=True)
-            time.sleep(delay)
-        
-
-        # 4) Guardar registro
-        nueva = {
-            "Nombre": nombre,
-            "Celular": celular,
-            "Categoría": asignada,
-            "Fecha": datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "Acompañantes": acompañantes
-        }
-        inscritos = pd.concat([inscritos, pd.DataFrame([nueva])], ignore_index=True)
-        inscritos.to_csv(csv_file, index=False)
-        push_file_to_github(
-            local_path=csv_file,
-            repo_path="inscritos.csv",
-            message="🤖 Actualizar lista de invitados"
-        )
+        # 4) Persistir en GitHub
+        with span("registro.encolar_push"):
+            push_file_to_github(
+                local_path=csv_file,
+                repo_path=csv_repo,
+                message="🤖 Actualizar lista de invitados",
+                prepare=store.sync_csv
+            )
 
         # 5) Notificar por email
-        nueva = {
-            "Nombre": nombre,
-            "Celular": celular,
-            "Categoría": asignada,
-            "Fecha": datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "Acompañantes": acompañantes
-        }
-        notify_hosts(nueva)
-
+        with span("registro.encolar_correo"):
+            notify_hosts(nueva)
+
+        # animación: la ruleta gira en el navegador, el servidor no espera
+        with span("registro.animacion"):
+            st_html(
+                build_wheel_3d_vertical(disponibles, asignada, dur=ANIMATION_DURATION_MS),
+                height=260
+            )
 
         st.success(f"Gracias por registrarte, **{nombre}** 🎉")
         st.markdown(f"🧸 Tu categoría asignada es: **{asignada}**")
-        img_path = img_map.get(asignada, "assets/baby_icon.png")
+        img_path = img_map.get(asignada, icono_default)
         st.image(img_path, width=400)
 
         mensaje = f"Hola {nombre}, tu categoría asignada para el baby shower es: {asignada} 🎁"
@@ -397,28 +335,28 @@ with tab1:
         link = f"https://wa.me/57{celular}?text={enc}"
         st.markdown(f"📲 [Enviar por WhatsApp]({link})", unsafe_allow_html=True)
 
-# --- PESTAÑA 2: CONSULTA DE CATEGORÍA ---
-with tab2:
+# --- SECCIÓN 2: CONSULTA DE CATEGORÍA ---
+@st.fragment
+def seccion_consulta():
     st.subheader("🔍 Consulta tu categoría asignada")
     celular_consulta = st.text_input("Ingresa tu número de celular (10 dígitos)", key="consulta")
     if st.button("Consultar", key="btn_consulta"):
         if not celular_consulta.isdigit() or len(celular_consulta) != 10:
             st.warning("Ingresa un número válido de 10 dígitos.")
         else:
-            df_filtrado = inscritos[inscritos["Celular"].astype(str) == celular_consulta]
-            if not df_filtrado.empty:
-                registro = df_filtrado.iloc[-1]
+            with span("consulta.busqueda"):
+                registro = store.find_guest(celular_consulta)
+            if registro is not None:
                 cat = registro["Categoría"]
                 st.write(f"**Nombre:** {registro['Nombre']}")
                 st.write(f"**Categoría:** {cat}")
 
                 # --- formateamos la fecha ---
-                raw = registro["Fecha"]                         # e.g. "2025-05-07 14:05"
-                dt  = datetime.strptime(raw, "%Y-%m-%d %H:%M")
+                dt = registro["Fecha"]                          # Timestamp, ya tipado por el store
                 fecha_bonita = (
                     f"{dt.day} de {MESES[dt.month]} de {dt.year}, "
                     f"{dt.hour:02d}:{dt.minute:02d}"
-                )
+                ) if format_fecha(dt) else "—"
                 # Markdown con estilo
                 st.markdown(
                     f"""
@@ -431,102 +369,210 @@ with tab2:
 
                 st.write(f"**Acompañantes:** {registro['Acompañantes']}")
 
-                img_path = img_map.get(cat, "assets/baby_icon.png")
+                img_path = img_map.get(cat, icono_default)
                 st.image(img_path, width=400)
             else:
                 st.error("No se encontró ningún registro con ese número.")
 
-# --- PESTAÑA: ANÁLISIS / DASHBOARD ---
-with tab3:
+# --- SECCIÓN: ANÁLISIS / DASHBOARD ---
+def seccion_analisis():
     st.subheader("📊 Dashboard de Registro")
     pwd2 = st.text_input("🔒 Clave", type="password", key="dash_pwd")
     if pwd2 != ADMIN_PWD:
         st.warning("🔐 Ingresa la contraseña para acceder a Configuración")
-    else:             
-        # --- Métricas resumen ---
-        total_invitados = inscritos.shape[0] # total de filas en el DataFrame
-        total_acomp      = inscritos["Acompañantes"].astype(int).sum()
-        total_asistentes   = total_invitados + total_acomp
-        avg_acomp        = (total_acomp / total_invitados) if total_invitados else 0
-
-        c1, c2, c3, c4 = st.columns(4)
-        c1.metric("👥 Invitados", total_invitados)
-        c2.metric("🤝 Acompañantes", total_acomp)
-        c3.metric("🎉 Total Asistentes",       total_asistentes)
-        c4.metric("📈 Acompañantes / Invitado", f"{avg_acomp:.2f}")
+    else:
+        panel_dashboard()
 
         st.markdown("---")
 
-        # --- Datos por categoría ---
-        counts = inscritos["Categoría"].value_counts().to_dict()
-        df_stats = pd.DataFrame([
-            {
-                "Categoría": cat,
-                "Asignadas": counts.get(cat, 0),
-                "Disponibles": max(0, categorias[cat] - counts.get(cat, 0))
-            }
-            for cat in categorias
-        ])
-
-        # --- 1) Gráfico de barras con Altair y tooltip ---
-        st.subheader("🎯 Cupos por Categoría")
-        df_bars = df_stats.melt(
-            id_vars="Categoría", 
-            value_vars=["Asignadas", "Disponibles"], 
-            var_name="Tipo", value_name="Cantidad"
+        # --- 3) Lista de invitados: búsqueda y paginación en el servidor ---
+        st.subheader("📋 Lista de Invitados")
+        lista_invitados()
+
+        panel_rendimiento()
+
+@st.fragment(run_every=REFRESH_S or None)
+def panel_dashboard():
+    """
+    Métricas, gráficos y cupos, repintados cada REFRESH_S segundos sin rerun
+    de la página. Cada vuelta cuesta un store.version() (stat de los CSV o
+    PRAGMA data_version); si no cambió, dashboard_data sale de la caché sin
+    leer datos ni reconstruir los gráficos de Altair.
+    """
+    with span("dashboard.version"):
+        version = store.version()
+    # --- Datos y gráficos, memoizados por versión de datos ---
+    with span("dashboard.datos"):
+        dash = dashboard_data(version, store, evento)
+
+    # --- Métricas resumen (contadores mantenidos por el store) ---
+    resumen = dash["resumen"]
+    total_invitados = resumen["invitados"]
+    total_acomp      = resumen["acompañantes"]
+    total_asistentes   = total_invitados + total_acomp
+    avg_acomp        = (total_acomp / total_invitados) if total_invitados else 0
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("👥 Invitados", total_invitados)
+    c2.metric("🤝 Acompañantes", total_acomp)
+    c3.metric("🎉 Total Asistentes",       total_asistentes)
+    c4.metric("📈 Acompañantes / Invitado", f"{avg_acomp:.2f}")
+
+    st.markdown("---")
+
+    # --- 1) Gráfico de barras con Altair y tooltip ---
+    st.subheader("🎯 Cupos por Categoría")
+    st.vega_lite_chart(dash["bars"], use_container_width=True)
+
+    st.markdown("---")
+
+    # --- 2) Gráfico circular (donut) con Altair ---
+    st.subheader("📊 Distribución de Asignaciones")
+    st.vega_lite_chart(dash["pie"], use_container_width=False)
+
+    # Mostrar estado actual de categorías
+    st.subheader("📊 Estado de categorías")
+    st.table(dash["df_cats"])
+    if REFRESH_S:
+        st.caption(f"Se actualiza solo cada {REFRESH_S:g} s.")
+
+@st.fragment
+def lista_invitados():
+    """Solo la página visible de los resultados viaja al navegador."""
+    c1, c2, c3 = st.columns([3, 2, 1])
+    texto = c1.text_input("Buscar por nombre o celular", key="lista_buscar")
+    categoria = c2.selectbox("Categoría", ["Todas"] + list(store.categorias()), key="lista_cat")
+    categoria = None if categoria == "Todas" else categoria
+
+    pagina = st.session_state.get("lista_pagina", 1)
+    filas, total = store.search(texto, categoria, pagina - 1)
+    paginas = max(1, -(-total // POR_PAGINA))
+    if pagina > paginas:
+        # la búsqueda cambió y ya no hay tantas páginas
+        pagina = st.session_state["lista_pagina"] = paginas
+        filas, total = store.search(texto, categoria, pagina - 1)
+    c3.number_input("Página", min_value=1, max_value=paginas, step=1, key="lista_pagina")
+
+    st.dataframe(
+        filas, use_container_width=True, hide_index=True,
+        column_config={"Fecha": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm")}
+    )
+    st.caption(f"{total} invitados · página {pagina} de {paginas}")
+
+def panel_rendimiento():
+    """Latencias por fase medidas en este proceso (ver metrics.py)."""
+    st.markdown("---")
+    st.subheader("⏱️ Rendimiento")
+    if not TRACER.enabled:
+        st.info("La instrumentación está desactivada ([metrics] ENABLED = false).")
+        return
+    filas = TRACER.stats()
+    if filas:
+        st.caption(f"Últimas {TRACER.window} mediciones por fase, desde el arranque del servidor.")
+        st.dataframe(filas, use_container_width=True, hide_index=True)
+    else:
+        st.info("Aún no hay mediciones.")
+    if st.button("Reiniciar métricas", key="btn_reset_metricas"):
+        TRACER.reset()
+        st.rerun()
+
+# --- SECCIÓN CONFIGURACIÓN ---
+@st.fragment
+def editor_cupos():
+    categorias = store.categorias()
+
+    # 3) Ajustar cupo de una categoría específica
+    st.subheader("✏️ Ajustar cupo por categoría")
+    cat_sel = st.selectbox(
+        "Selecciona la categoría a editar",
+        options=list(categorias.keys()),
+        key="sel_categoria"
+    )
+    nuevo_cupo = st.number_input(
+        label=f"Cupo total para «{cat_sel}»",
+        min_value=0,
+        value=categorias[cat_sel],
+        step=1,
+        key=f"cupo_{cat_sel}"
+    )
+    if st.button("Actualizar cupo", key="btn_actualizar_cupo"):
+        # Guardar para persistencia
+        store.set_cupo(cat_sel, nuevo_cupo)
+        push_file_to_github(
+            local_path=cat_file,
+            repo_path=cat_repo,
+            message=f"🤖 Actualizar cupo de categoría «{cat_sel}» a {nuevo_cupo}",
+            prepare=store.sync_csv
         )
-        bars = (
-            alt.Chart(df_bars)
-            .mark_bar(cornerRadiusEnd=4)
-            .encode(
-                x=alt.X("Categoría:N", sort=list(categorias.keys()), axis=alt.Axis(title=None)),
-                y=alt.Y("Cantidad:Q", axis=alt.Axis(title="Invitados")),
-                color=alt.Color("Tipo:N", scale=alt.Scale(domain=["Asignadas","Disponibles"],
-                                                        range=["#636EFA","#EF553B"])),
-                tooltip=["Categoría","Tipo","Cantidad"]
-            )
-            .properties(height=300, width="container")
+        st.success(f"Cupo de «{cat_sel}» actualizado a {nuevo_cupo}")
+
+
+@st.fragment
+def gestionar_invitado():
+    # 4) 👤 Gestionar invitado: buscar, mostrar y permitir editar o eliminar
+    st.subheader("👤 Gestionar Invitado")
+    texto = st.text_input("Buscar invitado por nombre o celular", key="admin_buscar")
+    coincidencias, total = store.search(texto, por_pagina=MAX_OPCIONES_ADMIN)
+    if total:
+        # el selector solo lleva las coincidencias, no la lista entera
+        if total > len(coincidencias):
+            st.caption(f"Mostrando {len(coincidencias)} de {total} coincidencias; escribe más para acotar.")
+        nombres = dict(zip(coincidencias["Celular"], coincidencias["Nombre"]))
+        sel = st.selectbox(
+            "Selecciona el número de celular:", list(nombres),
+            format_func=lambda c: f"{c} · {nombres[c]}", key="admin_sel"
         )
-        st.altair_chart(bars, use_container_width=True)
-
-        st.markdown("---")
+        rec = store.find_guest(sel)
+        with st.form("admin_form"):
+            nom = st.text_input("Nombre", value=rec['Nombre'])
+            cel_new = st.text_input("Celular", value=rec['Celular'])
+            cat = st.text_input("Categoría", value=rec['Categoría'])
+            fecha = st.text_input("Fecha", value=format_fecha(rec['Fecha']))
+            acomp = st.number_input("Acompañantes", min_value=0, value=int(rec['Acompañantes']), step=1)
+            btn_save = st.form_submit_button("Guardar Cambios")
+            btn_del = st.form_submit_button("Eliminar Invitado")
+
+        if btn_save:
+            # Validar unicidad contra otros registros
+            if canonical_phone(cel_new) != canonical_phone(sel) and store.has_guest(cel_new):
+                st.error("El número de celular ya existe en otro registro.")
+            else:
+                store.update_guest(sel, {
+                    "Nombre": nom, "Celular": cel_new, "Categoría": cat,
+                    "Fecha": fecha, "Acompañantes": acomp
+                })
+                st.success("Invitado actualizado correctamente.")
+                push_file_to_github(
+                    local_path=csv_file,
+                    repo_path=csv_repo,
+                    message="🤖 Actualizar lista de invitados",
+                    prepare=store.sync_csv
+                )
+                try:
+                    st.experimental_rerun()
+                except AttributeError:
+                    pass
 
-        # --- 2) Gráfico circular (donut) con Altair ---
-        st.subheader("📊 Distribución de Asignaciones")
-        pie = (
-            alt.Chart(df_stats)
-            .mark_arc(innerRadius=50, cornerRadius=3)
-            .encode(
-                theta=alt.Theta("Asignadas:Q", stack=True),
-                color=alt.Color("Categoría:N", legend=alt.Legend(title="Categoría")),
-                tooltip=["Categoría","Asignadas"]
+        if btn_del:
+            store.delete_guest(sel)
+            st.success("Invitado eliminado correctamente.")
+            push_file_to_github(
+                local_path=csv_file,
+                repo_path=csv_repo,
+                message="🤖 Actualizar lista de invitados",
+                prepare=store.sync_csv
             )
-            .properties(width=250, height=250)
-        )
-        st.altair_chart(pie)
+            try:
+                st.experimental_rerun()
+            except AttributeError:
+                pass
+    elif texto:
+        st.info("Ningún invitado coincide con la búsqueda.")
+    else:
+        st.info("No hay invitados registrados.")
 
-        st.markdown("---")
 
-        # --- 3) Tabla completa de invitados ---
-        st.subheader("📋 Lista de Invitados")
-        st.dataframe(inscritos, use_container_width=True)
-
-        # Mostrar estado actual de categorías
-        counts = inscritos["Categoría"].value_counts().to_dict()
-        data_cats = [
-            {
-                "Categoría": cat,
-                "Cupo total": categorias[cat],
-                "Asignadas": counts.get(cat, 0)
-            }
-            for cat in categorias
-        ]
-        df_cats = pd.DataFrame(data_cats)
-        st.subheader("📊 Estado de categorías")
-        st.table(df_cats)
-
-# --- PESTAÑA CONFIGURACIÓN ---
-with tab4:
+def seccion_configuracion():
     st.subheader("⚙️ Configuración (Admin)")
     pwd = st.text_input("🔒 Clave", type="password", key="config_pwd")
     if pwd != ADMIN_PWD:
@@ -537,83 +583,143 @@ with tab4:
     # if pwd == "7560":
     #     st.success("Acceso concedido")
 
-        # 3) Ajustar cupo de una categoría específica (al final)
-        st.subheader("✏️ Ajustar cupo por categoría")
-        cat_sel = st.selectbox(
-            "Selecciona la categoría a editar",
-            options=list(categorias.keys()),
-            key="sel_categoria"
-        )
-        nuevo_cupo = st.number_input(
-            label=f"Cupo total para «{cat_sel}»",
-            min_value=0,
-            value=categorias[cat_sel],
-            step=1,
-            key=f"cupo_{cat_sel}"
+        editor_cupos()
+
+        # Estado de la cola de subidas a GitHub
+        st.subheader("☁️ Sincronización con GitHub")
+        sync = get_sync_worker(st.secrets["general"]["GITHUB_TOKEN"], REPO_NAME, evento).status()
+        ultimo = (
+            datetime.fromtimestamp(sync["ultimo_exito"]).strftime("%Y-%m-%d %H:%M:%S")
+            if sync["ultimo_exito"] else "—"
         )
-        if st.button("Actualizar cupo", key="btn_actualizar_cupo"):
-            categorias[cat_sel] = nuevo_cupo
-
-            # Guardar en CSV para persistencia
-            pd.DataFrame([
-                {"Categoría": c, "Cupo total": categorias[c]}
-                for c in categorias
-            ]).to_csv(cat_file, index=False)
-            push_file_to_github(
-                local_path=cat_file,
-                repo_path="categorias.csv",
-                message=f"🤖 Actualizar cupo de categoría «{cat_sel}» a {nuevo_cupo}"
+        s1, s2, s3 = st.columns(3)
+        s1.metric("⏳ En cola", sync["pendientes"])
+        s2.metric("✅ Commits", sync["commits"])
+        s3.metric("🕒 Último éxito", ultimo)
+        if sync_arranque and "error" in sync_arranque:
+            st.caption(f"Sincronización de arranque fallida: {sync_arranque['error']}")
+        elif sync_arranque:
+            st.caption(
+                "Sincronización de arranque: "
+                f"{sync_arranque['agregados']} altas, {sync_arranque['actualizados']} cambios, "
+                f"{sync_arranque['eliminados']} bajas y {sync_arranque['cupos']} cupos traídos de GitHub"
+                + (" (sin cambios remotos)" if sync_arranque["sin_cambios_remotos"] else "")
             )
-            st.success(f"Cupo de «{cat_sel}» actualizado a {nuevo_cupo}")
-
-
-       # 4) 👤 Gestionar invitado: buscar, mostrar y permitir editar o eliminar
-        st.subheader("👤 Gestionar Invitado")
-        if not inscritos.empty:
-            sel = st.selectbox("Selecciona el número de celular:", inscritos['Celular'], key="admin_sel")
-            rec = inscritos[inscritos['Celular'] == sel].iloc[0]
-            with st.form("admin_form"):
-                nom = st.text_input("Nombre", value=rec['Nombre'])
-                cel_new = st.text_input("Celular", value=rec['Celular'])
-                cat = st.text_input("Categoría", value=rec['Categoría'])
-                fecha = st.text_input("Fecha", value=rec['Fecha'])
-                acomp = st.number_input("Acompañantes", min_value=0, value=int(rec['Acompañantes']), step=1)
-                btn_save = st.form_submit_button("Guardar Cambios")
-                btn_del = st.form_submit_button("Eliminar Invitado")
-
-            if btn_save:
-                # Validar unicidad contra otros registros
-                otros = inscritos[inscritos['Celular'] != sel]['Celular'].astype(str).tolist()
-                if cel_new in otros:
-                    st.error("El número de celular ya existe en otro registro.")
-                else:
-                    inscritos.loc[inscritos['Celular'] == sel, ['Nombre','Celular','Categoría','Fecha','Acompañantes']] = [
-                        nom, cel_new, cat, fecha, acomp
-                    ]
-                    inscritos.to_csv(csv_file, index=False)
-                    st.success("Invitado actualizado correctamente.")
-                    push_file_to_github(
-                        local_path=csv_file,
-                        repo_path="inscritos.csv",
-                        message="🤖 Actualizar lista de invitados"
-                    )
-                    try:
-                        st.experimental_rerun()
-                    except AttributeError:
-                        pass
-
-            if btn_del:
-                inscritos = inscritos[inscritos['Celular'] != sel]
-                inscritos.to_csv(csv_file, index=False)
-                st.success("Invitado eliminado correctamente.")
-                push_file_to_github(
-                    local_path=csv_file,
-                    repo_path="inscritos.csv",
-                    message="🤖 Actualizar lista de invitados"
-                )
-                try:
-                    st.experimental_rerun()
-                except AttributeError:
-                    pass
-        else:
-            st.info("No hay invitados registrados.")
+        if sync["omitidos"]:
+            st.caption(f"{sync['omitidos']} subidas omitidas: el fichero no había cambiado.")
+        if sync["ultimo_error"]:
+            st.caption(f"Último error ({sync['fallos']} fallos): {sync['ultimo_error']}")
+
+        # Estado de la cola de registro (control de admisión)
+        st.subheader("🚦 Cola de registro")
+        cola = admision.status()
+        a1, a2, a3 = st.columns(3)
+        a1.metric("⏳ En espera", cola["en_cola"])
+        a2.metric("✍️ Registrando", f"{cola['activos']} / {admision.workers}")
+        a3.metric("🚫 Rechazados", cola["rechazados"])
+
+        # Estado de la bandeja de correos a los anfitriones
+        st.subheader("✉️ Notificaciones")
+        mail = hosts_outbox().status()
+        m1, m2 = st.columns(2)
+        m1.metric("⏳ En cola", mail["pendientes"])
+        m2.metric("📨 Enviados", mail["enviados"])
+        if mail["ultimo_error"]:
+            st.caption(f"Último error: {mail['ultimo_error']}")
+
+        gestionar_invitado()
+
+        importar_invitados()
+
+        tarjetas_invitados()
+
+
+@st.fragment
+def importar_invitados():
+    # 5) 📥 Importar invitados ya confirmados desde un archivo
+    st.subheader("📥 Importar invitados")
+    archivo = st.file_uploader(
+        "CSV o Excel con columnas Nombre, Celular y (opcional) Acompañantes",
+        type=["csv", "xlsx"], key="import_file"
+    )
+    if archivo is None or not st.button("Importar", key="btn_importar"):
+        return
+    try:
+        lote = read_guest_file(archivo.name, archivo.getvalue())
+    except ImportError as e:
+        # el mensaje de pandas nombra el lector que falta
+        st.error(f"No se pudo leer el Excel ({e}); sube el archivo como CSV.")
+        return
+    except (ValueError, UnicodeDecodeError) as e:
+        st.error(f"No se pudo leer el archivo: {e}")
+        return
+
+    with span("importacion.lote"):
+        informe = get_assigner(evento).register_batch(lote)
+    registrados = int((informe["Estado"] == "Registrado").sum())
+    if registrados:
+        # un solo commit para todo el lote
+        push_file_to_github(
+            local_path=csv_file,
+            repo_path=csv_repo,
+            message=f"🤖 Importar {registrados} invitados",
+            prepare=store.sync_csv
+        )
+        st.success(f"Se importaron {registrados} de {len(informe)} invitados.")
+    else:
+        st.warning("No se importó ningún invitado.")
+    st.dataframe(informe, use_container_width=True, hide_index=True)
+    st.download_button(
+        "Descargar informe", informe.to_csv(index=False).encode("utf-8"),
+        file_name="informe_importacion.csv", mime="text/csv", key="btn_informe"
+    )
+
+
+@st.fragment
+def tarjetas_invitados():
+    # 6) 🖨️ Tarjetas por invitado y hojas por categoría, listas para imprimir
+    st.subheader("🖨️ Tarjetas para imprimir")
+    # la caché borra lo que no está en el lote: una carpeta hermana por evento
+    # ('_default' no puede ser un id: los ids empiezan por letra o dígito)
+    cards_dir = os.path.join(CARDS_DIR, "_default" if evento == EVENTO_DEFAULT else evento)
+    if st.button("Generar tarjetas", key="btn_tarjetas"):
+        with st.spinner("Dibujando tarjetas…"), span("tarjetas.generar"):
+            lote = build_cards(store.inscritos(), img_map, icono_default, store.categorias(),
+                               cache_dir=cards_dir)
+            pdf = os.path.join(cards_dir, f"lote-{lote['clave']}.pdf")
+            zip_path = os.path.join(cards_dir, f"lote-{lote['clave']}.zip")
+            if not (os.path.exists(pdf) and os.path.exists(zip_path)):
+                # el PDF y el ZIP del lote anterior ya no sirven
+                for nombre in os.listdir(cards_dir):
+                    if nombre.startswith("lote-"):
+                        os.remove(os.path.join(cards_dir, nombre))
+                export_pdf(lote, pdf)
+                export_zip(lote, zip_path)
+            lote["pdf"], lote["zip"] = pdf, zip_path
+        st.session_state[f"lote_tarjetas-{evento}"] = lote
+
+    lote = st.session_state.get(f"lote_tarjetas-{evento}")
+    if lote is None:
+        return
+    st.caption(
+        f"{len(lote['tarjetas'])} tarjetas y {len(lote['hojas'])} hojas: "
+        f"{lote['generadas']} dibujadas ahora, {lote['reutilizadas']} reutilizadas."
+    )
+    # ficheros ya escritos al generar; descargar no vuelve a ejecutar la página
+    d1, d2 = st.columns(2)
+    with open(lote["zip"], "rb") as f:
+        d1.download_button(
+            "Descargar ZIP", f, file_name="tarjetas.zip",
+            mime="application/zip", key="btn_tarjetas_zip", on_click="ignore"
+        )
+    with open(lote["pdf"], "rb") as f:
+        d2.download_button(
+            "Descargar PDF", f, file_name="tarjetas.pdf",
+            mime="application/pdf", key="btn_tarjetas_pdf", on_click="ignore"
+        )
+
+
+# Pintar solo la sección elegida
+dict(zip(SECCIONES, [
+    seccion_registro, seccion_consulta, seccion_analisis, seccion_configuracion
+]))[seccion]()
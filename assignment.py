@@ -0,0 +1,117 @@
+"""
+Asignación de categorías.
+
+Toda la secuencia leer-contar-elegir-guardar ocurre dentro de una
+transacción del store (en DataStore, lock del proceso + lock de fichero), así dos
+invitados que se registran a la vez nunca se quedan con el mismo último
+cupo ni se pisan las filas.
+"""
+import random
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from bulk_import import validate_guests
+from events import EVENTO_DEFAULT
+from storage import Storage, get_store
+
+
+class RegistroError(Exception):
+    """Registro rechazado; el mensaje se muestra tal cual al invitado."""
+
+
+class CelularDuplicado(RegistroError):
+    pass
+
+
+class SinCupo(RegistroError):
+    pass
+
+
+class AssignmentService:
+    """
+    Registra invitados asignándoles una categoría con cupo disponible.
+    - store: Storage (cualquier backend) donde se guardan los inscritos
+    - rng: generador aleatorio (inyectable para pruebas reproducibles)
+    """
+
+    def __init__(self, store: Storage, rng: random.Random = None):
+        self.store = store
+        self.rng = rng or random.Random()
+
+    def register(self, nombre: str, celular: str, acompañantes) -> tuple:
+        """
+        Valida, elige categoría y guarda el registro de forma atómica.
+        Devuelve (registro guardado, categorías que tenían cupo al elegir).
+        """
+        with self.store.transaction():
+            if self.store.has_guest(celular):
+                raise CelularDuplicado("Este número ya ha sido registrado.")
+
+            # Verificar categorías con cupo disponible
+            conteo = self.store.conteo()
+            categorias = self.store.categorias()
+            disponibles = [cat for cat, cupo in categorias.items() if conteo.get(cat, 0) < cupo]
+            if not disponibles:
+                raise SinCupo("Ya se asignaron todas las categorías disponibles.")
+
+            # Elegir la categoría definitiva y guardar
+            nueva = {
+                "Nombre": nombre,
+                "Celular": celular,
+                "Categoría": self.rng.choice(disponibles),
+                "Fecha": datetime.now().strftime("%Y-%m-%d %H:%M"),
+                "Acompañantes": acompañantes
+            }
+            self.store.add_guest(nueva)
+            return nueva, disponibles
+
+    def register_batch(self, lote: pd.DataFrame) -> pd.DataFrame:
+        """
+        Registra un lote leído de archivo (Nombre, Celular, Acompañantes).
+        Valida, asigna y guarda todo en una transacción con una sola escritura;
+        cada fila válida recibe una categoría al azar entre las que aún tienen
+        cupo, igual que si se hubieran registrado una a una.
+        Devuelve el informe por fila: Fila, Nombre, Celular, Categoría,
+        Acompañantes, Estado y Motivo.
+        """
+        with self.store.transaction():
+            informe = validate_guests(lote, self.store.known_phones())
+            conteo = self.store.conteo()
+            libres = {cat: cupo - conteo.get(cat, 0) for cat, cupo in self.store.categorias().items()}
+            disponibles = [cat for cat, n in libres.items() if n > 0]
+            fecha = datetime.now().strftime("%Y-%m-%d %H:%M")
+
+            nuevos, asignadas = [], []
+            for fila in informe.itertuples(index=False):
+                if not pd.isna(fila.Motivo) or not disponibles:
+                    asignadas.append(None)
+                    continue
+                cat = self.rng.choice(disponibles)
+                libres[cat] -= 1
+                if libres[cat] == 0:
+                    disponibles.remove(cat)
+                asignadas.append(cat)
+                nuevos.append({
+                    "Nombre": fila.Nombre,
+                    "Celular": fila.Celular,
+                    "Categoría": cat,
+                    "Fecha": fecha,
+                    "Acompañantes": fila.Acompañantes
+                })
+            self.store.add_guests(nuevos)
+
+        informe["Categoría"] = asignadas
+        informe.loc[informe["Motivo"].isna() & informe["Categoría"].isna(), "Motivo"] = \
+            "Ya se asignaron todas las categorías disponibles."
+        informe["Estado"] = np.where(informe["Motivo"].isna(), "Registrado", "Rechazado")
+        informe["Motivo"] = informe["Motivo"].fillna("")
+        return informe[["Fila", "Nombre", "Celular", "Categoría", "Acompañantes", "Estado", "Motivo"]]
+
+
+@st.cache_resource
+def get_assigner(evento: str = EVENTO_DEFAULT) -> AssignmentService:
+    """Servicio único por evento, compartido por todas las sesiones."""
+    return AssignmentService(get_store(evento))
@@ -0,0 +1,283 @@
+"""
+Benchmark sin navegador de app.py con streamlit.testing (AppTest).
+
+Para cada tamaño de lista de invitados copia la app a un directorio temporal,
+genera inscritos.csv/categorias.csv sintéticos y, en un proceso aparte (las
+cachés de Streamlit son globales al proceso), mide:
+
+- arranque:  primera ejecución de una sesión con las cachés de Streamlit vacías
+- rerun:     rerun sin interacción en la sección de Registro
+- registro:  envío del formulario de registro, de principio a fin
+- consulta:  búsqueda de un celular existente en la sección Consultar
+- dashboard: rerun de la sección Análisis con la clave ya introducida
+
+Los secrets son falsos y la subida a GitHub y el correo se sustituyen por
+fakes locales (github_sync.get_sync_worker / notifications.get_outbox, que
+es lo que usan push_file_to_github y notify_hosts), así no sale nada a la red.
+Se reporta p50/p95 en ms y el pico de memoria (tracemalloc) de una iteración
+extra de cada escenario.
+
+Uso (desde la raíz del repo):
+    python benchmarks/app_bench.py
+    python benchmarks/app_bench.py --sizes 50,5000 --reps 30 --backend sqlite
+    python benchmarks/app_bench.py --json antes.json
+    python benchmarks/app_bench.py --compare antes.json
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ESCENARIOS = ["arranque", "rerun", "registro", "consulta", "dashboard"]
+ADMIN_PWD = "7560"
+CELULAR_BASE = 3000000000     # celulares sembrados: CELULAR_BASE + i
+CELULAR_NUEVOS = 3500000000   # celulares de los registros del benchmark
+
+
+# --- DATOS SINTÉTICOS ---
+def preparar_directorio(destino: str, filas: int, reps: int):
+    """Copia la app y genera los CSV con `filas` inscritos y cupo de sobra."""
+    import pandas as pd
+
+    for nombre in os.listdir(RAIZ):
+        if nombre.endswith(".py"):
+            shutil.copy(os.path.join(RAIZ, nombre), destino)
+    shutil.copytree(os.path.join(RAIZ, "assets"), os.path.join(destino, "assets"))
+
+    sys.path.insert(0, destino)
+    from storage import CATEGORIAS_INICIALES
+
+    categorias = list(CATEGORIAS_INICIALES)
+    cupo = math.ceil(filas / len(categorias)) + 2 * reps + 10
+    pd.DataFrame({
+        "Categoría": categorias,
+        "Cupo total": [cupo] * len(categorias),
+    }).to_csv(os.path.join(destino, "categorias.csv"), index=False)
+    indice = pd.RangeIndex(filas)
+    pd.DataFrame({
+        "Nombre": "Invitado " + indice.astype(str),
+        "Celular": (CELULAR_BASE + indice).astype(str),
+        "Categoría": [categorias[i % len(categorias)] for i in range(filas)],
+        "Fecha": "2025-05-07 14:05",
+        "Acompañantes": indice % 3,
+    }).to_csv(os.path.join(destino, "inscritos.csv"), index=False)
+
+
+# --- FAKES DE GITHUB Y CORREO ---
+class FakeSync:
+    def __init__(self):
+        self.trabajos = []
+
+    def enqueue(self, local_path, repo_path=None, message=None, prepare=None):
+        self.trabajos.append(repo_path or local_path)
+
+    def status(self) -> dict:
+        return {"pendientes": 0, "ultimo_exito": None, "ultimo_error": None,
+                "commits": len(self.trabajos), "fallos": 0, "omitidos": 0}
+
+
+class FakeOutbox:
+    def __init__(self):
+        self.registros = []
+
+    def enqueue(self, registro: dict):
+        self.registros.append(registro)
+
+    def status(self) -> dict:
+        return {"pendientes": 0, "enviados": len(self.registros),
+                "ultimo_exito": None, "ultimo_error": None}
+
+
+def instalar_fakes():
+    import github_sync
+    import notifications
+
+    sync, outbox = FakeSync(), FakeOutbox()
+    github_sync.get_sync_worker = lambda token, repo_name=github_sync.REPO_NAME, evento=None: sync
+    notifications.get_outbox = lambda **kwargs: outbox
+    return sync, outbox
+
+
+# --- MEDICIÓN ---
+def percentil(valores: list, p: float) -> float:
+    """Percentil por rango más cercano."""
+    orden = sorted(valores)
+    return orden[max(0, math.ceil(p / 100 * len(orden)) - 1)]
+
+
+def nueva_sesion(backend: str):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file("app.py", default_timeout=120)
+    at.secrets["general"] = {"GITHUB_TOKEN": "fake", "STARTUP_SYNC": False}
+    at.secrets["email"] = {
+        "SMTP_SERVER": "localhost", "SMTP_PORT": 25, "USER": "bench@localhost",
+        "PASSWORD": "", "HOSTS": ["anfitriones@localhost"],
+    }
+    at.secrets["storage"] = {"BACKEND": backend}
+    # el escenario registro envía el formulario una y otra vez desde la misma sesión
+    at.secrets["admission"] = {"BURST": 10**6}
+    return at
+
+
+def ejecutar(at):
+    """at.run() cronometrado; falla si la app lanzó una excepción."""
+    t0 = time.perf_counter()
+    at.run()
+    dt = time.perf_counter() - t0
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return dt
+
+
+def escenarios(backend: str, filas: int) -> dict:
+    """{escenario: función que hace una iteración y devuelve sus segundos}."""
+    import streamlit as st
+
+    contador = iter(range(10**9))
+
+    def arranque():
+        st.cache_resource.clear()
+        st.cache_data.clear()
+        return ejecutar(nueva_sesion(backend))
+
+    def en_seccion(seccion: str, pwd_key: str = None):
+        at = nueva_sesion(backend)
+        at.run()
+        at.radio(key="seccion").set_value(seccion)
+        ejecutar(at)
+        if pwd_key:
+            at.text_input(key=pwd_key).input(ADMIN_PWD)
+            ejecutar(at)
+        return at
+
+    at_rerun = en_seccion("📝 Registro")
+    at_registro = en_seccion("📝 Registro")
+    at_consulta = en_seccion("🔍 Consultar")
+    at_dashboard = en_seccion("📊 Análisis", "dash_pwd")
+
+    def registro():
+        i = next(contador)
+        campos = {t.label: t for t in at_registro.text_input}
+        campos["Nombre completo"].input(f"Benchmark {i}")
+        campos["Número de celular (sin espacios ni +57)"].input(str(CELULAR_NUEVOS + i))
+        at_registro.button[0].click()
+        dt = ejecutar(at_registro)
+        if not at_registro.success:
+            raise RuntimeError(f"registro rechazado: {[e.value for e in at_registro.error]}")
+        return dt
+
+    def consulta():
+        i = next(contador)
+        at_consulta.text_input(key="consulta").input(str(CELULAR_BASE + (i * 7919) % filas))
+        at_consulta.button(key="btn_consulta").click()
+        dt = ejecutar(at_consulta)
+        if at_consulta.error:
+            raise RuntimeError(at_consulta.error[0].value)
+        return dt
+
+    return {
+        "arranque": arranque,
+        "rerun": lambda: ejecutar(at_rerun),
+        "registro": registro,
+        "consulta": consulta,
+        "dashboard": lambda: ejecutar(at_dashboard),
+    }
+
+
+def worker(filas: int, reps: int, backend: str, salida: str):
+    """Corre todos los escenarios para un tamaño y escribe el resultado en JSON."""
+    directorio = tempfile.mkdtemp(prefix="bench-")
+    try:
+        preparar_directorio(directorio, filas, reps)
+        os.chdir(directorio)
+        sync, outbox = instalar_fakes()
+        pasos = escenarios(backend, filas)
+
+        resultados = []
+        for nombre in ESCENARIOS:
+            paso = pasos[nombre]
+            paso()  # calentamiento
+            tiempos = [paso() for _ in range(reps)]
+            tracemalloc.start()
+            paso()
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            resultados.append({
+                "escenario": nombre,
+                "filas": filas,
+                "p50_ms": percentil(tiempos, 50) * 1000,
+                "p95_ms": percentil(tiempos, 95) * 1000,
+                "pico_mb": pico / 2**20,
+            })
+        if outbox.registros and len(sync.trabajos) != len(outbox.registros):
+            raise RuntimeError("push y notificación no se encolaron una vez por registro")
+    finally:
+        os.chdir(RAIZ)
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(resultados, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="50,5000,100000",
+                        help="tamaños de la lista de invitados, separados por comas")
+    parser.add_argument("--reps", type=int, default=20, help="iteraciones por escenario")
+    parser.add_argument("--backend", default="csv", choices=["csv", "sqlite"])
+    parser.add_argument("--json", help="guarda los resultados en este fichero")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior para comparar p50")
+    parser.add_argument("--verbose", action="store_true", help="muestra el stderr de Streamlit")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        worker(args.worker, args.reps, args.backend, args.out)
+        return
+
+    anteriores = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            anteriores = {(r["escenario"], r["filas"]): r for r in json.load(f)["resultados"]}
+
+    resultados = []
+    print(f"{'escenario':<12}{'filas':>8}{'p50 ms':>10}{'p95 ms':>10}{'pico MB':>10}"
+          + (f"{'Δ p50':>10}" if anteriores else ""))
+    for filas in (int(n) for n in args.sizes.split(",")):
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+            salida = tmp.name
+        try:
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", str(filas),
+                 "--reps", str(args.reps), "--backend", args.backend, "--out", salida],
+                check=True, stderr=None if args.verbose else subprocess.DEVNULL
+            )
+            with open(salida, encoding="utf-8") as f:
+                filas_resultado = json.load(f)
+        finally:
+            os.remove(salida)
+        for r in filas_resultado:
+            antes = anteriores.get((r["escenario"], r["filas"]))
+            delta = f"{(r['p50_ms'] / antes['p50_ms'] - 1) * 100:>+9.0f}%" if antes else ""
+            print(f"{r['escenario']:<12}{r['filas']:>8}{r['p50_ms']:>10.1f}"
+                  f"{r['p95_ms']:>10.1f}{r['pico_mb']:>10.1f}{delta}")
+        resultados.extend(filas_resultado)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"backend": args.backend, "reps": args.reps, "resultados": resultados},
+                      f, indent=2, ensure_ascii=False)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
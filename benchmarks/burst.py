@@ -0,0 +1,162 @@
+"""
+Prueba de carga del registro: una ráfaga de sesiones que pulsan "Registrarme" a la vez.
+
+Simula lo que pasa cuando el enlace se comparte en un grupo: `--sessions`
+hilos (uno por sesión de Streamlit) esperan en una barrera y envían el
+formulario en el mismo instante. Cada envío sigue el camino de escritura de
+seccion_registro en app.py: cubeta de fichas de la sesión, turno en el
+AdmissionController y AssignmentService.register sobre un store real en un
+directorio temporal, con --write-ms de escritura lenta simulada dentro de la
+transacción. Una parte de las sesiones hace doble clic (--double-submit)
+para ejercitar la cubeta de fichas.
+
+AppTest no admite ejecutar sesiones en paralelo, por eso no se pinta la UI;
+lo que se mide es lo que la UI espera:
+- latencia de extremo a extremo por envío (p50/p95/máx)
+- espera en cola (fase registro.espera_cola) y el puesto máximo visto
+- rechazos de la cola, envíos absorbidos por la cubeta y duplicados
+
+Uso (desde la raíz del repo):
+    python benchmarks/burst.py
+    python benchmarks/burst.py --sessions 200 --workers 4 --backend sqlite
+    python benchmarks/burst.py --sin-admision      # mismo burst sin control, para comparar
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from app_bench import CELULAR_NUEVOS, percentil, preparar_directorio
+
+
+def rafaga(args) -> dict:
+    """Lanza la ráfaga sobre un store nuevo y devuelve las métricas."""
+    from admission import AdmissionController, ColaLlena, TokenBucket
+    from assignment import AssignmentService, CelularDuplicado, RegistroError
+    from metrics import TRACER
+    from storage import DataStore
+
+    if args.backend == "sqlite":
+        from sqlite_store import SqliteStore
+        store = SqliteStore("bench.db")
+    else:
+        store = DataStore()
+    servicio = AssignmentService(store, random.Random(0))
+    control = AdmissionController(args.workers, args.max_queue, args.timeout)
+    TRACER.reset()
+
+    barrera = threading.Barrier(args.sessions)
+    lock = threading.Lock()
+    latencias, puestos = [], []
+    cuenta = {"registrados": 0, "cola_llena": 0, "cubeta": 0, "duplicados": 0, "otros": 0}
+
+    def registrar(i: int):
+        with store.transaction():
+            time.sleep(args.write_ms / 1000)  # fsync lento, disco compartido...
+            servicio.register(f"Ráfaga {i}", str(CELULAR_NUEVOS + i), "0")
+
+    def enviar(i: int, bucket: TokenBucket):
+        t0 = time.perf_counter()
+        if not bucket.take():
+            resultado = "cubeta"
+        else:
+            try:
+                if args.sin_admision:
+                    registrar(i)
+                else:
+                    with control.admit(on_wait=puestos.append):
+                        registrar(i)
+                resultado = "registrados"
+            except ColaLlena:
+                resultado = "cola_llena"
+            except CelularDuplicado:
+                resultado = "duplicados"
+            except RegistroError:
+                resultado = "otros"
+            if resultado != "registrados":
+                bucket.refund()
+        with lock:
+            latencias.append(time.perf_counter() - t0)
+            cuenta[resultado] += 1
+
+    def sesion(i: int, clics: int):
+        bucket = TokenBucket(args.burst, args.refill_s)
+        barrera.wait()
+        hilos = [threading.Thread(target=enviar, args=(i, bucket)) for _ in range(clics)]
+        for h in hilos:
+            h.start()
+            time.sleep(0.05)  # el segundo clic llega un instante después
+        for h in hilos:
+            h.join()
+
+    rng = random.Random(1)
+    sesiones = [
+        threading.Thread(target=sesion, args=(i, 2 if rng.random() < args.double_submit else 1))
+        for i in range(args.sessions)
+    ]
+    t0 = time.perf_counter()
+    for s in sesiones:
+        s.start()
+    for s in sesiones:
+        s.join()
+    total = time.perf_counter() - t0
+
+    espera = next((f for f in TRACER.stats() if f["Fase"] == "registro.espera_cola"), None)
+    return {
+        "sesiones": args.sessions,
+        "envios": len(latencias),
+        "segundos": total,
+        "registros_por_s": cuenta["registrados"] / total,
+        "latencia_p50_ms": percentil(latencias, 50) * 1000,
+        "latencia_p95_ms": percentil(latencias, 95) * 1000,
+        "latencia_max_ms": max(latencias) * 1000,
+        "espera_cola_p50_ms": espera["p50 ms"] if espera else 0.0,
+        "espera_cola_p95_ms": espera["p95 ms"] if espera else 0.0,
+        "puesto_max": max(puestos, default=0),
+        **cuenta,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=60, help="sesiones que envían a la vez")
+    parser.add_argument("--filas", type=int, default=500, help="inscritos ya registrados")
+    parser.add_argument("--workers", type=int, default=2, help="[admission] WORKERS")
+    parser.add_argument("--max-queue", type=int, default=100, help="[admission] MAX_QUEUE")
+    parser.add_argument("--timeout", type=float, default=60, help="[admission] TIMEOUT_S")
+    parser.add_argument("--burst", type=int, default=1, help="[admission] BURST")
+    parser.add_argument("--refill-s", type=float, default=5, help="[admission] REFILL_S")
+    parser.add_argument("--write-ms", type=float, default=20,
+                        help="escritura lenta simulada por registro, dentro de la transacción")
+    parser.add_argument("--double-submit", type=float, default=0.3,
+                        help="fracción de sesiones que hacen doble clic")
+    parser.add_argument("--backend", default="csv", choices=["csv", "sqlite"])
+    parser.add_argument("--sin-admision", action="store_true",
+                        help="sin AdmissionController (todas las sesiones escriben a la vez)")
+    parser.add_argument("--json", help="guarda el resultado en este fichero")
+    args = parser.parse_args()
+
+    raiz = os.getcwd()
+    directorio = tempfile.mkdtemp(prefix="burst-")
+    try:
+        preparar_directorio(directorio, args.filas, args.sessions)
+        os.chdir(directorio)
+        resultado = rafaga(args)
+    finally:
+        os.chdir(raiz)
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    for clave, valor in resultado.items():
+        print(f"{clave:<20}{valor:>12.1f}" if isinstance(valor, float) else f"{clave:<20}{valor:>12}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Informe del coste de importación al arrancar app.py (python -X importtime).
+
+Ejecuta app.py en modo "bare" (sin servidor) con -X importtime, suma el tiempo
+propio (self) de todos los módulos de cada paquete raíz (pandas.core.frame
+cuenta en pandas) y lo compara con la línea base guardada en
+benchmarks/importtime_baseline.json.
+
+Con el tiempo propio cada paquete carga solo con lo suyo, importe quien lo
+importe primero: reordenar los imports de app.py no mueve el coste de pandas
+de un módulo local a otro ni aparece como regresión.
+
+Uso (desde la raíz del repo):
+    python benchmarks/importtime.py            # informe + comparación
+    python benchmarks/importtime.py --check    # sale con código 1 si hay regresiones
+    python benchmarks/importtime.py --update   # reescribe la línea base
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(RAIZ, "benchmarks", "importtime_baseline.json")
+
+# Un paquete es regresión si crece más de esto (relativo y absoluto, en µs)
+UMBRAL_RELATIVO = 0.25
+UMBRAL_ABSOLUTO_US = 20_000
+
+
+def medir() -> dict:
+    """{paquete raíz: µs propios de todos sus módulos} de una ejecución de app.py."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "app.py"],
+        cwd=RAIZ, capture_output=True, text=True
+    )
+    tiempos = defaultdict(int)
+    for linea in proc.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, _, nombre = linea[len("import time:"):].split("|")
+        tiempos[nombre.strip().split(".")[0]] += int(propio)
+    return dict(tiempos)
+
+
+def mejor_de(repeticiones: int) -> dict:
+    """Mínimo por paquete entre varias ejecuciones, para quitar ruido."""
+    mejores = {}
+    for _ in range(repeticiones):
+        for paquete, us in medir().items():
+            mejores[paquete] = min(us, mejores.get(paquete, us))
+    mejores["_total"] = sum(us for p, us in mejores.items() if p != "_total")
+    return mejores
+
+
+def regresiones(actual: dict, base: dict) -> list:
+    filas = []
+    for paquete, us in actual.items():
+        antes = base.get(paquete, 0)
+        if us - antes > UMBRAL_ABSOLUTO_US and us > antes * (1 + UMBRAL_RELATIVO):
+            filas.append((paquete, antes, us))
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--update", action="store_true")
+    args = parser.parse_args()
+
+    actual = mejor_de(args.runs)
+    base = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE, encoding="utf-8") as f:
+            base = json.load(f)
+
+    print(f"{'paquete':<28}{'ms':>10}{'base ms':>10}")
+    orden = sorted(actual.items(), key=lambda kv: -kv[1])
+    for paquete, us in orden[:args.top + 1]:
+        antes = f"{base[paquete] / 1000:.1f}" if paquete in base else "—"
+        print(f"{paquete:<28}{us / 1000:>10.1f}{antes:>10}")
+
+    if args.update:
+        with open(BASELINE, "w", encoding="utf-8") as f:
+            json.dump(dict(orden), f, indent=2)
+            f.write("\n")
+        print(f"Línea base actualizada: {BASELINE}")
+        return
+
+    malos = regresiones(actual, base)
+    for paquete, antes, us in malos:
+        print(f"REGRESIÓN {paquete}: {antes / 1000:.1f} ms -> {us / 1000:.1f} ms")
+    if args.check and malos:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Prueba de estrés de la concurrencia del registro: varios procesos con un pool
+de hilos cada uno disparan cientos de registros contra los mismos ficheros.
+
+Reproduce el peor caso de producción: varios workers de Streamlit (procesos)
+sobre el mismo inscritos.csv, cada uno con muchas sesiones (hilos). Cada
+intento pasa por AssignmentService.register, con un cupo total menor que el
+número de intentos y parte de los celulares repetidos, así compiten por el
+último cupo y por el mismo celular a la vez.
+
+Al terminar se abre un store nuevo (como un proceso que arranca después) y
+se comprueba:
+- sin sobreventa: ninguna categoría supera su cupo
+- sin filas perdidas: cada registro que un worker dio por bueno está en disco,
+  y no hay filas que nadie registró
+- sin duplicados: un celular aparece una sola vez
+- se llenó el cupo: se registraron min(cupo total, celulares distintos)
+
+Sale con código 1 si alguna comprobación falla.
+
+Uso (desde la raíz del repo):
+    python benchmarks/stress.py
+    python benchmarks/stress.py --procesos 4 --hilos 32 --intentos 1000 --backend sqlite
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app_bench import CELULAR_NUEVOS, preparar_directorio
+
+
+def abrir_store(backend: str):
+    from storage import DataStore
+
+    if backend == "sqlite":
+        from sqlite_store import SqliteStore
+        return SqliteStore("stress.db")
+    return DataStore()
+
+
+def proceso(directorio: str, backend: str, hilos: int, intentos: list, celulares: int) -> dict:
+    """Un worker de Streamlit: su propio store y un pool de hilos registrando."""
+    os.chdir(directorio)
+    sys.path.insert(0, directorio)
+    from assignment import AssignmentService, CelularDuplicado, SinCupo
+
+    servicio = AssignmentService(abrir_store(backend))
+    resultado = {"registrados": [], "sin_cupo": 0, "duplicados": 0}
+
+    def registrar(i: int):
+        celular = str(CELULAR_NUEVOS + i % celulares)
+        try:
+            servicio.register(f"Estrés {i}", celular, i % 3)
+            return celular
+        except SinCupo:
+            return "sin_cupo"
+        except CelularDuplicado:
+            return "duplicados"
+
+    with ThreadPoolExecutor(hilos) as pool:
+        for r in pool.map(registrar, intentos):
+            if r in ("sin_cupo", "duplicados"):
+                resultado[r] += 1
+            else:
+                resultado["registrados"].append(r)
+    return resultado
+
+
+def comprobar(backend: str, cupos: dict, registrados: list, celulares: int) -> list:
+    """Errores encontrados en el estado final, leído por un store nuevo."""
+    store = abrir_store(backend)
+    df = store.inscritos()
+    errores = []
+    for categoria, n in df["Categoría"].value_counts().items():
+        if n > cupos.get(categoria, 0):
+            errores.append(f"sobreventa en {categoria}: {n} > {cupos.get(categoria, 0)}")
+    en_disco = df["Celular"].tolist()
+    if len(set(en_disco)) != len(en_disco):
+        errores.append(f"{len(en_disco) - len(set(en_disco))} celulares duplicados en disco")
+    if len(set(registrados)) != len(registrados):
+        errores.append("un celular se dio por registrado dos veces")
+    perdidos = set(registrados) - set(en_disco)
+    if perdidos:
+        errores.append(f"{len(perdidos)} registros confirmados no están en disco")
+    fantasmas = set(en_disco) - set(registrados)
+    if fantasmas:
+        errores.append(f"{len(fantasmas)} filas en disco que nadie registró")
+    esperados = min(sum(cupos.values()), celulares)
+    if len(en_disco) != esperados:
+        errores.append(f"se registraron {len(en_disco)}, se esperaban {esperados}")
+    return errores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--procesos", type=int, default=3, help="workers de Streamlit simulados")
+    parser.add_argument("--hilos", type=int, default=16, help="sesiones a la vez por proceso")
+    parser.add_argument("--intentos", type=int, default=450, help="registros intentados en total")
+    parser.add_argument("--cupo", type=int, default=100, help="cupo total, repartido entre categorías")
+    parser.add_argument("--celulares", type=int, default=300,
+                        help="celulares distintos (menos que intentos: hay repetidos)")
+    parser.add_argument("--backend", default="csv", choices=["csv", "sqlite"])
+    parser.add_argument("--json", help="guarda el resultado en este fichero")
+    args = parser.parse_args()
+
+    raiz = os.getcwd()
+    directorio = tempfile.mkdtemp(prefix="stress-")
+    try:
+        preparar_directorio(directorio, 0, 0)
+        os.chdir(directorio)
+        import pandas as pd
+        from storage import CATEGORIAS_INICIALES
+
+        categorias = list(CATEGORIAS_INICIALES)
+        base, resto = divmod(args.cupo, len(categorias))
+        cupos = {c: base + (i < resto) for i, c in enumerate(categorias)}
+        pd.DataFrame({"Categoría": list(cupos), "Cupo total": list(cupos.values())}) \
+            .to_csv("categorias.csv", index=False)
+
+        # los intentos intercalados entre procesos, así todos compiten por lo mismo
+        repartos = [list(range(p, args.intentos, args.procesos)) for p in range(args.procesos)]
+        # spawn: cada proceso carga su store desde cero, como un worker aparte
+        contexto = multiprocessing.get_context("spawn")
+        t0 = time.perf_counter()
+        with contexto.Pool(args.procesos) as pool:
+            resultados = pool.starmap(proceso, [
+                (directorio, args.backend, args.hilos, intentos, args.celulares)
+                for intentos in repartos
+            ])
+        total = time.perf_counter() - t0
+
+        registrados = [c for r in resultados for c in r["registrados"]]
+        errores = comprobar(args.backend, cupos, registrados, args.celulares)
+    finally:
+        os.chdir(raiz)
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    resultado = {
+        "intentos": args.intentos,
+        "segundos": total,
+        "registros_por_s": len(registrados) / total,
+        "registrados": len(registrados),
+        "sin_cupo": sum(r["sin_cupo"] for r in resultados),
+        "duplicados": sum(r["duplicados"] for r in resultados),
+        "errores": errores,
+    }
+    for clave, valor in resultado.items():
+        if clave != "errores":
+            print(f"{clave:<20}{valor:>12.1f}" if isinstance(valor, float) else f"{clave:<20}{valor:>12}")
+    for error in errores:
+        print(f"ERROR: {error}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Comprobación de github_sync.SyncWorker contra un repositorio falso en memoria.
+
+Cada escenario arranca un worker sobre un directorio temporal y un FakeRepo
+que imita la parte de la API de PyGithub que usa github_sync (contents API y
+Git Data API) y anota cada llamada. No sale nada a la red: el módulo github
+se sustituye por un falso aunque PyGithub esté instalado.
+
+Escenarios:
+- lote:      dos ficheros encolados a la vez salen en un solo commit
+- omitir:    un fichero sin cambios no hace ninguna llamada
+- agrupar:   cambios seguidos del mismo fichero son un solo update_file
+- reinicio:  con el estado en disco, un worker nuevo no vuelve a subir nada
+- conflicto: un fichero editado en GitHub falla, se reconsulta el SHA y sube
+- caida:     GitHub caído más intentos de los que antes se toleraban: el
+             trabajo sigue en cola y sube al volver
+- salida:    flush() sube un trabajo que esperaba un backoff largo
+
+Uso (desde la raíz del repo):
+    python benchmarks/sync_push.py
+    python benchmarks/sync_push.py --solo conflicto
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# --- REPOSITORIO FALSO ---
+class InputGitTreeElement:
+    def __init__(self, path, mode, type, content=None, sha=None):
+        self.path, self.content = path, content
+
+
+def instalar_github_falso():
+    falso = types.ModuleType("github")
+    falso.InputGitTreeElement = InputGitTreeElement
+    sys.modules["github"] = falso
+
+
+class Obj:
+    def __init__(self, **kw):
+        self.__dict__.update(kw)
+
+
+class FakeRepo:
+    """
+    Una rama en memoria: {path: contenido} y la lista de commits.
+    - caida: número de escrituras que fallan antes de volver a funcionar
+    """
+
+    def __init__(self, caida: int = 0):
+        self.files = {"README.md": "x"}
+        self.commits = []
+        self.calls = []
+        self.caida = caida
+
+    def _blob(self, path):
+        from github_sync import git_blob_sha
+        return git_blob_sha(self.files[path].encode())
+
+    def _escritura(self, nombre):
+        self.calls.append(nombre)
+        if self.caida:
+            self.caida -= 1
+            raise RuntimeError("503 Service Unavailable")
+
+    def get_contents(self, path, ref=None):
+        self.calls.append("get_contents")
+        if path not in self.files:
+            raise Exception("404")
+        return Obj(sha=self._blob(path))
+
+    def create_file(self, path, message, content, branch):
+        self._escritura("create_file")
+        self.files[path] = content
+        self.commits.append((message, [path]))
+
+    def update_file(self, path, message, content, sha, branch):
+        self._escritura("update_file")
+        if sha != self._blob(path):
+            raise Exception("409 conflict")
+        self.files[path] = content
+        self.commits.append((message, [path]))
+
+    def get_git_ref(self, ref):
+        self.calls.append("get_git_ref")
+        repo = self
+
+        class Ref:
+            object = Obj(sha="head")
+
+            def edit(self, sha):
+                repo._escritura("ref.edit")
+                repo.files = repo._arbol
+                repo.commits.append(repo._commit)
+        return Ref()
+
+    def get_git_commit(self, sha):
+        self.calls.append("get_git_commit")
+        return Obj(sha=sha, tree=Obj(sha=self._tree_sha(self.files), files=dict(self.files)))
+
+    def create_git_tree(self, elementos, base_tree):
+        self.calls.append("create_git_tree")
+        files = dict(base_tree.files)
+        for e in elementos:
+            files[e.path] = e.content
+        return Obj(sha=self._tree_sha(files), files=files)
+
+    def create_git_commit(self, message, tree, parents):
+        self.calls.append("create_git_commit")
+        self._arbol = tree.files
+        self._commit = (message, sorted(set(tree.files) - {"README.md"}))
+        return Obj(sha="commit")
+
+    @staticmethod
+    def _tree_sha(files):
+        return hashlib.sha1(repr(sorted(files.items())).encode()).hexdigest()
+
+
+def escribir(path: str, texto: str, modo: str = "w"):
+    with open(path, modo, encoding="utf-8", newline="") as f:
+        f.write(texto)
+
+
+def leer(path: str) -> str:
+    with open(path, encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+# --- ESCENARIOS ---
+def lote(SyncWorker):
+    repo = FakeRepo()
+    escribir("inscritos.csv", "a\n")
+    escribir("categorias.csv", "c\n")
+    w = SyncWorker(lambda: repo, batch_window=0.2)
+    w.enqueue("inscritos.csv", message="🤖 Actualizar lista de invitados")
+    w.enqueue("categorias.csv", message="🤖 Actualizar cupos")
+    assert w.wait_idle(5)
+    assert len(repo.commits) == 1, repo.commits
+    assert repo.commits[0][1] == ["categorias.csv", "inscritos.csv"], repo.commits
+    assert repo.files["inscritos.csv"] == "a\n" and repo.files["categorias.csv"] == "c\n"
+
+
+def omitir(SyncWorker):
+    repo = FakeRepo()
+    escribir("inscritos.csv", "a\n")
+    w = SyncWorker(lambda: repo, batch_window=0)
+    w.enqueue("inscritos.csv")
+    assert w.wait_idle(5)
+    n = len(repo.calls)
+    w.enqueue("inscritos.csv")
+    assert w.wait_idle(5)
+    assert repo.calls[n:] == [], repo.calls[n:]
+    assert w.status()["omitidos"] == 1
+
+
+def agrupar(SyncWorker):
+    repo = FakeRepo()
+    escribir("inscritos.csv", "a\n")
+    w = SyncWorker(lambda: repo, batch_window=0.2)
+    w.enqueue("inscritos.csv")
+    assert w.wait_idle(5)
+    escribir("inscritos.csv", "b\n", "a")
+    n = len(repo.calls)
+    for _ in range(5):
+        w.enqueue("inscritos.csv")
+    assert w.wait_idle(5)
+    # el SHA remoto ya se conoce: ni get_contents
+    assert repo.calls[n:] == ["update_file"], repo.calls[n:]
+    assert repo.commits[-1][0].endswith("(5 cambios)"), repo.commits[-1]
+    assert repo.files["inscritos.csv"] == "a\nb\n"
+
+
+def reinicio(SyncWorker):
+    repo = FakeRepo()
+    escribir("inscritos.csv", "a\n")
+    w = SyncWorker(lambda: repo, batch_window=0, state_file="estado.json")
+    w.enqueue("inscritos.csv")
+    assert w.wait_idle(5)
+    w.stop()
+    n = len(repo.calls)
+    w2 = SyncWorker(lambda: repo, batch_window=0, state_file="estado.json")
+    w2.enqueue("inscritos.csv")
+    assert w2.wait_idle(5)
+    assert repo.calls[n:] == [], repo.calls[n:]
+
+
+def conflicto(SyncWorker):
+    repo = FakeRepo()
+    escribir("inscritos.csv", "a\n")
+    w = SyncWorker(lambda: repo, backoff=0.05, batch_window=0)
+    w.enqueue("inscritos.csv")
+    assert w.wait_idle(5)
+    repo.files["inscritos.csv"] = "editado en GitHub\n"
+    escribir("inscritos.csv", "b\n", "a")
+    n = len(repo.calls)
+    w.enqueue("inscritos.csv")
+    time.sleep(0.3)
+    assert w.wait_idle(5)
+    assert w.status()["fallos"] == 1, w.status()
+    assert repo.calls[n:] == ["update_file", "get_contents", "update_file"], repo.calls[n:]
+    assert repo.files["inscritos.csv"] == leer("inscritos.csv")
+
+
+def caida(SyncWorker):
+    repo = FakeRepo(caida=8)
+    escribir("inscritos.csv", "a\n")
+    w = SyncWorker(lambda: repo, backoff=0.01, max_backoff=0.05, batch_window=0)
+    w.enqueue("inscritos.csv")
+    limite = time.monotonic() + 5
+    while repo.caida and time.monotonic() < limite:
+        time.sleep(0.05)
+    assert w.wait_idle(5)
+    assert w.status()["fallos"] == 8, w.status()
+    assert repo.files.get("inscritos.csv") == "a\n", "el trabajo se descartó durante la caída"
+
+
+def salida(SyncWorker):
+    repo = FakeRepo(caida=1)
+    escribir("inscritos.csv", "a\n")
+    w = SyncWorker(lambda: repo, backoff=30, batch_window=0)
+    w.enqueue("inscritos.csv")
+    time.sleep(0.3)
+    assert w.status()["pendientes"] == 1, "el trabajo fallido debe esperar su backoff en cola"
+    assert w.flush(5)
+    assert repo.files.get("inscritos.csv") == "a\n"
+
+
+ESCENARIOS = {f.__name__: f for f in [lote, omitir, agrupar, reinicio, conflicto, caida, salida]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--solo", choices=list(ESCENARIOS), help="ejecuta un solo escenario")
+    args = parser.parse_args()
+
+    sys.path.insert(0, RAIZ)
+    instalar_github_falso()
+    from github_sync import SyncWorker
+
+    raiz = os.getcwd()
+    fallos = 0
+    for nombre, escenario in ESCENARIOS.items():
+        if args.solo and nombre != args.solo:
+            continue
+        directorio = tempfile.mkdtemp(prefix="sync-push-")
+        os.chdir(directorio)
+        try:
+            escenario(SyncWorker)
+            print(f"{nombre:<12}ok")
+        except Exception as e:
+            fallos += 1
+            print(f"{nombre:<12}FALLO: {type(e).__name__}: {e}")
+        finally:
+            os.chdir(raiz)
+            shutil.rmtree(directorio, ignore_errors=True)
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Comprobación de la sincronización de arranque (github_pull) contra un
+servidor HTTP local que imita la API de contenidos de GitHub.
+
+El servidor sirve los ficheros de REMOTO con ETag y responde 304 a un
+If-None-Match que coincide y 404 a lo que no existe; anota cada petición.
+Cada escenario usa un directorio temporal con sus CSV locales, un store
+nuevo por "arranque" y sync_on_startup sin su caché de Streamlit.
+
+Escenarios:
+- primera:    sin base, unión; ante conflicto gana GitHub; cupos traídos
+- reinicio:   sin cambios remotos son 304 (If-None-Match) y un alta local
+              nueva pide subir
+- borrado:    un borrado en GitHub se aplica y una edición local se conserva
+- transitorio: si la fusión falla, la base no avanza; en el siguiente
+              arranque el alta que solo está en GitHub se añade, no se borra
+- lleno:      la unión añade el alta de GitHub aunque la categoría ya esté
+              llena en local (en SQLite el trigger de cupo no la bloquea)
+- sin_red:    GitHub no responde: error en el resumen y datos locales intactos
+- evento:     un evento con nombre lee y guarda su base bajo eventos/<id>/
+
+Uso (desde la raíz del repo):
+    python benchmarks/sync_startup.py
+    python benchmarks/sync_startup.py --backend sqlite --solo transitorio
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CABECERA = "Nombre,Celular,Categoría,Fecha,Acompañantes\n"
+A = "A,3000000001,Vestimenta,2025-01-01 10:00,0\n"
+A2 = "A2,3000000001,Vestimenta,2025-01-01 10:00,0\n"
+B = "B,3000000002,Vestimenta,2025-01-01 10:00,1\n"
+C = "C,3000000003,Hora de Dormir,2025-01-02 10:00,2\n"
+CUPOS = "Categoría,Cupo total\nVestimenta,5\nHora de Dormir,5\n"
+CUPOS_REMOTOS = "Categoría,Cupo total\nVestimenta,8\nHora de Dormir,5\n"
+
+# Estado del servidor falso: {ruta en el repo: contenido} y peticiones recibidas
+REMOTO = {}
+PETICIONES = []
+
+
+class ContenidosHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("/contents/")[1].split("?")[0]
+        PETICIONES.append((path, self.headers.get("If-None-Match")))
+        if path not in REMOTO:
+            self.send_response(404)
+            self.end_headers()
+            return
+        data = REMOTO[path].encode("utf-8")
+        etag = '"%s"' % hashlib.sha1(data).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class Entorno:
+    """Un directorio de la app: CSV locales, backend y URL de la API."""
+
+    def __init__(self, backend: str, api_url: str):
+        self.backend = backend
+        self.api_url = api_url
+
+    def escribir(self, inscritos: str, categorias: str = CUPOS, carpeta: str = ""):
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        for nombre, texto in (("inscritos.csv", inscritos), ("categorias.csv", categorias)):
+            with open(os.path.join(carpeta, nombre), "w", encoding="utf-8", newline="") as f:
+                f.write(texto)
+
+    def store(self, evento: str = None):
+        """Store nuevo, como en un arranque del proceso."""
+        from events import EVENTO_DEFAULT, event_path
+        from storage import CAT_FILE, CSV_FILE, DataStore
+
+        evento = evento or EVENTO_DEFAULT
+        csv_file, cat_file = event_path(evento, CSV_FILE), event_path(evento, CAT_FILE)
+        if self.backend == "sqlite":
+            from sqlite_store import SqliteStore
+            return SqliteStore(event_path(evento, "sync.db"), csv_file, cat_file)
+        return DataStore(csv_file, cat_file)
+
+    def arrancar(self, store, repo_dir: str = "", push=None) -> dict:
+        from github_pull import sync_on_startup
+
+        # sin la caché de cache_resource: cada llamada es el primer arranque del proceso
+        return sync_on_startup.__wrapped__(store, "tok", "o/r", api_url=self.api_url,
+                                             _push=push, repo_dir=repo_dir)
+
+
+def nombres(store) -> list:
+    return sorted(store.inscritos()["Nombre"].tolist())
+
+
+# --- ESCENARIOS ---
+def primera(e: Entorno):
+    e.escribir(CABECERA + A + B)
+    REMOTO.update({"inscritos.csv": CABECERA + A2 + B + C, "categorias.csv": CUPOS_REMOTOS})
+    store = e.store()
+    r = e.arrancar(store)
+    assert "error" not in r, r
+    assert (r["agregados"], r["actualizados"], r["cupos"]) == (1, 1, 1), r
+    assert not r["subir"], r
+    assert nombres(store) == ["A2", "B", "C"], nombres(store)
+    assert store.categorias()["Vestimenta"] == 8
+
+
+def reinicio(e: Entorno):
+    primera(e)
+    PETICIONES.clear()
+    store = e.store()
+    store.add_guest({"Nombre": "D", "Celular": "3000000004", "Categoría": "Vestimenta",
+                     "Fecha": "2025-01-03 10:00", "Acompañantes": 0})
+    subidas = []
+    r = e.arrancar(store, push=lambda: subidas.append(1))
+    assert r["sin_cambios_remotos"], r
+    assert all(etag for _, etag in PETICIONES), PETICIONES
+    assert r["subir"] and subidas == [1], (r, subidas)
+
+
+def borrado(e: Entorno):
+    primera(e)
+    store = e.store()
+    store.update_guest("3000000003", {"Nombre": "C local", "Celular": "3000000003",
+                                      "Categoría": "Hora de Dormir", "Fecha": "2025-01-02 10:00",
+                                      "Acompañantes": 2})
+    REMOTO["inscritos.csv"] = CABECERA + A2 + C
+    r = e.arrancar(e.store())
+    assert r["eliminados"] == 1, r
+    assert nombres(e.store()) == ["A2", "C local"], nombres(e.store())
+
+
+def transitorio(e: Entorno):
+    primera(e)
+    REMOTO["inscritos.csv"] += "E,3000000005,Vestimenta,2025-01-04 10:00,0\n"
+    store = e.store()
+    alta = store.add_guests
+
+    def falla(registros):
+        store.add_guests = alta
+        raise OSError("disco lleno")
+    store.add_guests = falla
+    r = e.arrancar(store)
+    assert "error" in r, r
+
+    store = e.store()
+    subidas = []
+    r = e.arrancar(store, push=lambda: subidas.append(1))
+    assert "error" not in r, r
+    assert store.has_guest("3000000005"), "el alta que solo estaba en GitHub se perdió"
+    assert r["eliminados"] == 0 and not r["subir"] and not subidas, r
+
+
+def lleno(e: Entorno):
+    cupos = "Categoría,Cupo total\nVestimenta,2\nHora de Dormir,5\n"
+    e.escribir(CABECERA + A + B, cupos)
+    tercero = "Tercero,3000000009,Vestimenta,2025-01-05 10:00,0\n"
+    REMOTO.update({"inscritos.csv": CABECERA + A + tercero, "categorias.csv": cupos})
+    r = e.arrancar(e.store())
+    assert "error" not in r, r
+    assert r["agregados"] == 1 and r["subir"], r
+    store = e.store()
+    assert nombres(store) == ["A", "B", "Tercero"], nombres(store)
+    if e.backend == "sqlite":
+        try:
+            store.add_guest({"Nombre": "D", "Celular": "3000000004", "Categoría": "Vestimenta",
+                             "Fecha": "2025-01-03 10:00", "Acompañantes": 0})
+        except Exception as error:
+            assert "sin cupo" in str(error), error
+        else:
+            raise AssertionError("el trigger de cupo no se restauró tras la fusión")
+
+
+def sin_red(e: Entorno):
+    e.escribir(CABECERA + A + B)
+    store = e.store()
+    e.api_url = "http://127.0.0.1:9"
+    r = e.arrancar(store)
+    assert "error" in r, r
+    assert nombres(store) == ["A", "B"], nombres(store)
+
+
+def evento(e: Entorno):
+    e.escribir(CABECERA + A)
+    e.escribir(CABECERA + B, carpeta=os.path.join("eventos", "ana"))
+    REMOTO.update({"inscritos.csv": CABECERA + A, "eventos/ana/inscritos.csv": CABECERA + B + C})
+    e.arrancar(e.store())
+    ana = e.store("ana")
+    r = e.arrancar(ana, repo_dir="eventos/ana")
+    assert r["agregados"] == 1, r
+    assert nombres(ana) == ["B", "C"] and nombres(e.store()) == ["A"]
+    assert "eventos/ana/inscritos.csv" in [p for p, _ in PETICIONES], PETICIONES
+    assert os.path.exists(os.path.join(".github_cache", "main", "eventos", "ana", "inscritos.csv"))
+
+
+ESCENARIOS = {f.__name__: f for f in [primera, reinicio, borrado, transitorio, lleno, sin_red, evento]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backend", default="csv", choices=["csv", "sqlite"])
+    parser.add_argument("--solo", choices=list(ESCENARIOS), help="ejecuta un solo escenario")
+    args = parser.parse_args()
+
+    sys.path.insert(0, RAIZ)
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), ContenidosHandler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{servidor.server_port}"
+
+    raiz = os.getcwd()
+    fallos = 0
+    for nombre, escenario in ESCENARIOS.items():
+        if args.solo and nombre != args.solo:
+            continue
+        REMOTO.clear()
+        PETICIONES.clear()
+        directorio = tempfile.mkdtemp(prefix="sync-startup-")
+        os.chdir(directorio)
+        try:
+            escenario(Entorno(args.backend, api_url))
+            print(f"{nombre:<12}ok")
+        except Exception as e:
+            fallos += 1
+            print(f"{nombre:<12}FALLO: {type(e).__name__}: {e}")
+        finally:
+            os.chdir(raiz)
+            shutil.rmtree(directorio, ignore_errors=True)
+    servidor.shutdown()
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Importación masiva de invitados desde CSV o Excel (pestaña Configuración).
+
+La validación trabaja sobre la tabla completa con operaciones de pandas:
+celulares de 10 dígitos, repetidos dentro del archivo y ya registrados. La
+asignación de categorías y la escritura del lote las hace
+AssignmentService.register_batch en una sola transacción.
+"""
+import io
+import zipfile
+
+import pandas as pd
+
+from storage import canonical_phones
+
+# Encabezados aceptados en el archivo -> columna de inscritos
+ENCABEZADOS = {
+    "nombre": "Nombre",
+    "nombre completo": "Nombre",
+    "celular": "Celular",
+    "telefono": "Celular",
+    "teléfono": "Celular",
+    "acompañantes": "Acompañantes",
+    "acompanantes": "Acompañantes",
+}
+
+
+def read_guest_file(nombre: str, datos: bytes) -> pd.DataFrame:
+    """
+    Lee un .csv o .xlsx subido y devuelve Nombre/Celular/Acompañantes como texto.
+    Lanza ValueError si faltan columnas e ImportError si falta el lector de Excel.
+    (.xls no: pandas lo lee con xlrd, que no está en requirements.txt.)
+    """
+    if nombre.lower().endswith(".xlsx"):
+        try:
+            df = pd.read_excel(io.BytesIO(datos), dtype=str)
+        except zipfile.BadZipFile:
+            raise ValueError("el archivo no es un Excel .xlsx válido") from None
+    else:
+        # sep=None detecta ',' o ';' (Excel en español exporta con ';')
+        df = pd.read_csv(io.BytesIO(datos), dtype=str, sep=None, engine="python", encoding="utf-8-sig")
+    df = df.rename(columns=lambda c: ENCABEZADOS.get(str(c).strip().lower(), str(c).strip()))
+    faltan = {"Nombre", "Celular"} - set(df.columns)
+    if faltan:
+        raise ValueError(f"Faltan columnas en el archivo: {', '.join(sorted(faltan))}")
+    if "Acompañantes" not in df.columns:
+        df["Acompañantes"] = "0"
+    return df[["Nombre", "Celular", "Acompañantes"]].reset_index(drop=True)
+
+
+def validate_guests(df: pd.DataFrame, registrados) -> pd.DataFrame:
+    """
+    Valida el lote completo sin recorrerlo fila a fila.
+    - df: salida de read_guest_file
+    - registrados: celulares canónicos ya inscritos (Storage.known_phones())
+    Devuelve el lote normalizado con 'Fila' (línea del archivo) y 'Motivo'
+    (None si la fila es válida; si hay varios problemas, el primero).
+    """
+    df = df.reset_index(drop=True)
+    celulares = canonical_phones(df["Celular"].fillna(""))
+    nombres = df["Nombre"].fillna("").astype(str).str.strip()
+    acomp = pd.to_numeric(
+        df["Acompañantes"].fillna("").astype(str).str.strip().replace("", "0"), errors="coerce"
+    )
+
+    motivo = pd.Series(None, index=df.index, dtype=object)
+
+    def marcar(mask: pd.Series, texto: str):
+        motivo[mask & motivo.isna()] = texto
+
+    marcar(nombres == "", "Falta el nombre")
+    marcar(celulares.str.len() != 10, "Celular inválido (deben ser 10 dígitos)")
+    marcar(acomp.isna() | (acomp < 0) | (acomp % 1 != 0), "Número de acompañantes inválido")
+    marcar(celulares.isin(registrados), "Este número ya ha sido registrado")
+    marcar(celulares.duplicated(keep="first"), "Celular repetido en el archivo")
+
+    return pd.DataFrame({
+        "Fila": df.index + 2,  # línea del archivo: cabecera + base 1
+        "Nombre": nombres,
+        "Celular": celulares,
+        "Acompañantes": acomp.where(motivo.isna(), 0).fillna(0).astype(int),
+        "Motivo": motivo,
+    })
@@ -0,0 +1,295 @@
+"""
+Tarjetas imprimibles por invitado y hojas por categoría (pestaña Configuración).
+
+Cada tarjeta (nombre, categoría e imagen de la categoría) se guarda en
+assets/.cache/tarjetas/<evento> con el hash de lo que se imprime en el nombre del
+fichero: al volver a generar solo se dibujan las tarjetas nuevas o cuyo
+registro cambió. Lo que falta se dibuja en un pool de procesos (Pillow
+trabaja con el GIL tomado), y el lote se entrega en un ZIP con las imágenes
+y en un PDF listo para imprimir: hojas por categoría y tarjetas de 10 en 10
+por página A4. Los dos se escriben una vez por lote, junto a las tarjetas.
+
+Sin pool para pocas tarjetas: arrancar los procesos cuesta más que dibujarlas.
+"""
+import functools
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import unicodedata
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+CACHE_DIR = os.path.join("assets", ".cache", "tarjetas")
+
+# Cambiar si cambia el diseño: invalida todas las tarjetas en caché
+DISENO = 1
+
+# Tarjeta de 3.5 x 2 pulgadas y hoja A4, a 300 ppp
+PPP = 300
+TARJETA = (1050, 600)
+A4 = (2480, 3508)
+MARGEN = 60
+JPEG_QUALITY = 90
+
+# Invitados por columna en la hoja de una categoría (dos columnas por hoja)
+FILAS_COLUMNA = 44
+
+# Por debajo de esto se dibuja en el propio proceso
+MIN_POOL = 16
+
+# Mismos tonos que la ruleta del registro, en el orden de las categorías
+COLORES = ["#FFB6C1", "#FFDAB9", "#E6E6FA", "#FFFACD", "#C1FFC1", "#B0E0E6"]
+
+# Fuentes con tildes y eñes; la de Pillow por defecto no las tiene
+FUENTES = ("DejaVuSans.ttf", "LiberationSans-Regular.ttf", "Arial.ttf", "arial.ttf")
+FUENTES_NEGRITA = ("DejaVuSans-Bold.ttf", "LiberationSans-Bold.ttf", "Arial Bold.ttf", "arialbd.ttf")
+
+
+# --- DIBUJO (se ejecuta en los procesos del pool) ---
+@functools.lru_cache(maxsize=32)
+def _fuente(size: int, negrita: bool = False):
+    from PIL import ImageFont
+
+    for nombre in FUENTES_NEGRITA if negrita else FUENTES:
+        try:
+            return ImageFont.truetype(nombre, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size)
+
+
+def _ajustar(draw, texto: str, ancho: int, size: int, minimo: int, negrita: bool = False) -> tuple:
+    """(líneas, fuente): reduce la letra hasta que quepa; si ni así, parte en dos líneas."""
+    for s in range(size, minimo - 1, -4):
+        fuente = _fuente(s, negrita)
+        if draw.textlength(texto, font=fuente) <= ancho:
+            return [texto], fuente
+    fuente = _fuente(minimo, negrita)
+    palabras, lineas = texto.split(), [""]
+    for palabra in palabras:
+        prueba = f"{lineas[-1]} {palabra}".strip()
+        if draw.textlength(prueba, font=fuente) <= ancho or not lineas[-1]:
+            lineas[-1] = prueba
+        else:
+            lineas.append(palabra)
+    return lineas[:2], fuente
+
+
+@functools.lru_cache(maxsize=16)
+def _icono(path: str, lado: int):
+    from PIL import Image
+
+    with Image.open(path) as im:
+        im = im.convert("RGBA")
+        im.thumbnail((lado, lado), Image.LANCZOS)
+        return im
+
+
+def _guardar(im, destino: str):
+    tmp = f"{destino}.{os.getpid()}.tmp"
+    if destino.endswith(".png"):
+        im.save(tmp, format="PNG", compress_level=6, dpi=(PPP, PPP))
+    else:
+        im.convert("RGB").save(tmp, format="JPEG", quality=JPEG_QUALITY, dpi=(PPP, PPP))
+    os.replace(tmp, destino)
+
+
+def render_card(datos: dict, destino: str) -> str:
+    """Dibuja la tarjeta de un invitado en destino (JPEG). Devuelve destino."""
+    from PIL import Image, ImageDraw
+
+    ancho, alto = TARJETA
+    im = Image.new("RGB", TARJETA, "white")
+    draw = ImageDraw.Draw(im)
+    draw.rounded_rectangle((8, 8, ancho - 8, alto - 8), radius=36, outline=datos["color"], width=16)
+
+    lado = alto - 2 * MARGEN - 40
+    icono = _icono(datos["icono"], lado)
+    im.paste(icono, (MARGEN + 20, (alto - icono.height) // 2), icono)
+
+    x = MARGEN + lado + 70
+    util = ancho - x - MARGEN
+    draw.text((x, MARGEN + 20), "Baby Shower", font=_fuente(34), fill="#999999")
+    lineas, fuente = _ajustar(draw, datos["Nombre"], util, 64, 36, negrita=True)
+    y = MARGEN + 90
+    for linea in lineas:
+        draw.text((x, y), linea, font=fuente, fill="#333333")
+        y += fuente.size + 12
+    y += 30
+    draw.text((x, y), "Tu categoría:", font=_fuente(32), fill="#777777")
+    lineas, fuente = _ajustar(draw, datos["Categoría"], util, 50, 30, negrita=True)
+    y += 48
+    for linea in lineas:
+        draw.text((x, y), linea, font=fuente, fill="#333333")
+        y += fuente.size + 10
+    if datos["Acompañantes"]:
+        texto = f"+{datos['Acompañantes']} acompañante{'s' if datos['Acompañantes'] > 1 else ''}"
+        draw.text((x, alto - MARGEN - 40), texto, font=_fuente(30), fill="#777777")
+
+    _guardar(im, destino)
+    return destino
+
+
+def render_sheet(datos: dict, destino: str) -> str:
+    """Dibuja la hoja A4 (PNG) de una categoría con sus invitados. Devuelve destino."""
+    from PIL import Image, ImageDraw
+
+    ancho, alto = A4
+    margen = 2 * MARGEN
+    im = Image.new("RGB", A4, "white")
+    draw = ImageDraw.Draw(im)
+    draw.rectangle((0, 0, ancho, 420), fill=datos["color"])
+    icono = _icono(datos["icono"], 300)
+    im.paste(icono, (margen, 60), icono)
+    draw.text((margen + 360, 110), datos["Categoría"], font=_fuente(96, True), fill="#333333")
+    draw.text((margen + 360, 250), datos["subtitulo"], font=_fuente(48), fill="#555555")
+
+    columnas = 1 if len(datos["filas"]) <= FILAS_COLUMNA else 2
+    ancho_col = (ancho - 2 * margen) // columnas
+    for i, fila in enumerate(datos["filas"]):
+        col, pos = divmod(i, FILAS_COLUMNA)
+        lineas, fuente = _ajustar(draw, fila, ancho_col - 40, 44, 28)
+        draw.text((margen + col * ancho_col, 520 + pos * 64), lineas[0], font=fuente, fill="#333333")
+    if datos["pagina"]:
+        draw.text((ancho - margen - 200, alto - 120), datos["pagina"], font=_fuente(36), fill="#999999")
+
+    _guardar(im, destino)
+    return destino
+
+
+def _render(trabajo: tuple) -> str:
+    tipo, datos, destino = trabajo
+    return (render_card if tipo == "tarjeta" else render_sheet)(datos, destino)
+
+
+# --- LOTE ---
+def _clave(*partes) -> str:
+    texto = json.dumps([DISENO, *partes], ensure_ascii=False, default=str)
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:16]
+
+
+def _slug(texto: str) -> str:
+    texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", texto.lower()).strip("-") or "invitado"
+
+
+def build_cards(inscritos, iconos: dict, icono_default: str, categorias: dict = None,
+                cache_dir: str = CACHE_DIR, workers: int = None) -> dict:
+    """
+    Tarjetas y hojas de todos los inscritos, reutilizando las de la caché.
+    - inscritos: Storage.inscritos()
+    - iconos: {categoría: ruta de la imagen} (img_map); icono_default para el resto
+    - categorias: {categoría: cupo} para el orden, los colores y el cupo de las hojas
+    - workers: procesos del pool (por defecto, los núcleos disponibles, máx. 4)
+    Devuelve {"tarjetas": [(nombre en el ZIP, ruta)], "hojas": [...], "clave": hash
+    del lote, "generadas": n, "reutilizadas": n}.
+    """
+    categorias = dict(categorias or {})
+    cats = inscritos["Categoría"].astype(object)
+    registros = sorted(
+        zip(inscritos["Nombre"].fillna("").str.strip().tolist(),
+            cats.where(cats.notna(), "Sin categoría").tolist(),
+            inscritos["Acompañantes"].tolist()),
+        key=lambda r: _slug(r[0])
+    )
+    for _, cat, _ in registros:
+        categorias.setdefault(cat, None)
+    colores = {cat: COLORES[i % len(COLORES)] for i, cat in enumerate(categorias)}
+
+    os.makedirs(cache_dir, exist_ok=True)
+    trabajos, tarjetas, hojas = [], [], []
+
+    def pedir(tipo: str, datos: dict, ext: str) -> str:
+        destino = os.path.join(cache_dir, f"{tipo}-{_clave(tipo, datos)}{ext}")
+        if not os.path.exists(destino):
+            trabajos.append((tipo, datos, destino))
+        return destino
+
+    for i, (nombre, cat, acomp) in enumerate(registros, start=1):
+        datos = {"Nombre": nombre, "Categoría": cat, "Acompañantes": int(acomp),
+                 "icono": iconos.get(cat, icono_default), "color": colores[cat]}
+        tarjetas.append((f"tarjetas/{i:03d}-{_slug(nombre)}.jpg", pedir("tarjeta", datos, ".jpg")))
+
+    por_hoja = 2 * FILAS_COLUMNA
+    for cat, cupo in categorias.items():
+        filas = [nombre + (f"  (+{acomp})" if acomp else "") for nombre, c, acomp in registros if c == cat]
+        subtitulo = f"{len(filas)} invitados" + (f" · cupo {cupo}" if cupo is not None else "")
+        paginas = max(1, -(-len(filas) // por_hoja))
+        for p in range(paginas):
+            datos = {"Categoría": cat, "subtitulo": subtitulo, "icono": iconos.get(cat, icono_default),
+                     "color": colores[cat], "filas": filas[p * por_hoja:(p + 1) * por_hoja],
+                     "pagina": f"{p + 1} / {paginas}" if paginas > 1 else ""}
+            sufijo = f"-{p + 1}" if paginas > 1 else ""
+            hojas.append((f"hojas/{_slug(cat)}{sufijo}.png", pedir("hoja", datos, ".png")))
+
+    workers = workers or min(4, os.cpu_count() or 1)
+    if len(trabajos) >= MIN_POOL and workers > 1:
+        # spawn: el proceso de Streamlit tiene hilos, y fork con hilos no es seguro
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            list(pool.map(_render, trabajos, chunksize=max(1, len(trabajos) // (4 * workers))))
+    else:
+        for trabajo in trabajos:
+            _render(trabajo)
+
+    # lo que no forma parte de este lote (registros cambiados o borrados) sobra
+    vigentes = {ruta for _, ruta in tarjetas + hojas}
+    for nombre in os.listdir(cache_dir):
+        ruta = os.path.join(cache_dir, nombre)
+        if nombre.startswith(("tarjeta-", "hoja-")) and ruta not in vigentes:
+            os.remove(ruta)
+
+    return {
+        "tarjetas": tarjetas,
+        "hojas": hojas,
+        "clave": _clave(sorted(vigentes)),
+        "generadas": len(trabajos),
+        "reutilizadas": len(tarjetas) + len(hojas) - len(trabajos),
+    }
+
+
+def export_zip(lote: dict, destino: str) -> str:
+    """
+    ZIP con hojas/ y tarjetas/ (las imágenes ya están comprimidas: se guardan sin más).
+    Se escribe una vez por lote, a un temporal y luego os.replace, como el PDF.
+    """
+    tmp = f"{destino}.{os.getpid()}.tmp"
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_STORED) as zf:
+        for nombre, ruta in lote["hojas"] + lote["tarjetas"]:
+            zf.write(ruta, nombre)
+    os.replace(tmp, destino)
+    return destino
+
+
+def export_pdf(lote: dict, destino: str) -> str:
+    """
+    PDF para imprimir: una página por hoja de categoría y 10 tarjetas por A4.
+    Las páginas se añaden una a una al fichero, así nunca hay más de una en memoria.
+    """
+    from PIL import Image
+
+    tmp = f"{destino}.{os.getpid()}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    def agregar(pagina):
+        pagina.save(tmp, format="PDF", resolution=PPP, append=os.path.exists(tmp))
+
+    for _, ruta in lote["hojas"]:
+        with Image.open(ruta) as hoja:
+            agregar(hoja.convert("RGB"))
+
+    ancho, alto = TARJETA
+    x0 = (A4[0] - 2 * ancho) // 3
+    y0 = (A4[1] - 5 * alto) // 6
+    for inicio in range(0, len(lote["tarjetas"]), 10):
+        pagina = Image.new("RGB", A4, "white")
+        for i, (_, ruta) in enumerate(lote["tarjetas"][inicio:inicio + 10]):
+            fila, col = divmod(i, 2)
+            with Image.open(ruta) as tarjeta:
+                pagina.paste(tarjeta, (x0 + col * (ancho + x0), y0 + fila * (alto + y0)))
+        agregar(pagina)
+
+    os.replace(tmp, destino)
+    return destino
@@ -0,0 +1,82 @@
+"""
+Datos y gráficos del dashboard (pestaña Análisis).
+
+Los DataFrames derivados y las especificaciones Vega-Lite de los gráficos se
+memoizan por la versión de datos del store, así un admin que escribe o cambia
+de pestaña no recalcula ni re-serializa gráficos idénticos.
+"""
+from typing import TYPE_CHECKING
+
+import pandas as pd
+import streamlit as st
+
+from events import EVENTO_DEFAULT
+
+# altair (y jsonschema, narwhals...) solo se carga al abrir el dashboard
+if TYPE_CHECKING:
+    import altair as alt
+
+COLORES_TIPO = ["#636EFA", "#EF553B"]
+
+
+def build_bars(df_stats: pd.DataFrame, orden: list) -> "alt.Chart":
+    """Barras Asignadas/Disponibles por categoría, con tooltip."""
+    import altair as alt
+
+    df_bars = df_stats.melt(
+        id_vars="Categoría",
+        value_vars=["Asignadas", "Disponibles"],
+        var_name="Tipo", value_name="Cantidad"
+    )
+    return (
+        alt.Chart(df_bars)
+        .mark_bar(cornerRadiusEnd=4)
+        .encode(
+            x=alt.X("Categoría:N", sort=orden, axis=alt.Axis(title=None)),
+            y=alt.Y("Cantidad:Q", axis=alt.Axis(title="Invitados")),
+            color=alt.Color("Tipo:N", scale=alt.Scale(domain=["Asignadas", "Disponibles"],
+                                                      range=COLORES_TIPO)),
+            tooltip=["Categoría", "Tipo", "Cantidad"]
+        )
+        .properties(height=300, width="container")
+    )
+
+
+def build_pie(df_stats: pd.DataFrame) -> "alt.Chart":
+    """Donut con la distribución de asignaciones."""
+    import altair as alt
+
+    return (
+        alt.Chart(df_stats)
+        .mark_arc(innerRadius=50, cornerRadius=3)
+        .encode(
+            theta=alt.Theta("Asignadas:Q", stack=True),
+            color=alt.Color("Categoría:N", legend=alt.Legend(title="Categoría")),
+            tooltip=["Categoría", "Asignadas"]
+        )
+        .properties(width=250, height=250)
+    )
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def dashboard_data(version: int, _store, evento: str = EVENTO_DEFAULT) -> dict:
+    """
+    Todo lo que pinta el dashboard para una versión de datos.
+    - version: store.version(); con evento, es la clave de la caché
+    - _store: Storage de donde leer (no forma parte de la clave)
+    - evento: id del evento del store (dos eventos pueden ir por la misma versión)
+    Devuelve resumen, df_stats, df_cats y las specs 'bars'/'pie' ya serializadas.
+    """
+    resumen = _store.resumen()
+    df_resumen = pd.DataFrame(
+        resumen["categorias"], columns=["Categoría", "Cupo total", "Asignadas", "Disponibles"]
+    )
+    df_stats = df_resumen[["Categoría", "Asignadas", "Disponibles"]]
+    orden = df_resumen["Categoría"].tolist()
+    return {
+        "resumen": resumen,
+        "df_stats": df_stats,
+        "df_cats": df_resumen[["Categoría", "Cupo total", "Asignadas"]],
+        "bars": build_bars(df_stats, orden).to_dict(),
+        "pie": build_pie(df_stats).to_dict(),
+    }
@@ -0,0 +1,106 @@
+"""
+Varios baby showers en la misma app: cada evento es una partición aislada.
+
+El evento se elige con el parámetro de la URL (?evento=ana-2025). Sin él se
+usa el evento por defecto, que conserva las rutas de siempre (inscritos.csv,
+categorias.csv y assets/ en la raíz, y las mismas rutas en el repo). Un evento
+con nombre vive en eventos/<id>/:
+
+- inscritos.csv, categorias.csv (o la base SQLite) con sus propios locks,
+  diario y caché en memoria: cada evento se carga al pedirlo por primera vez
+  y uno grande no frena a los demás
+- assets/ opcional: una imagen con el mismo nombre que en assets/ de la raíz
+  (banner.png, vestimenta.png...) la sustituye solo para ese evento
+- en GitHub, los mismos ficheros bajo eventos/<id>/
+
+Un evento existe si tiene carpeta o una sección [eventos.<id>] en los
+secrets, con NOMBRE, HOSTS (correos de los anfitriones) y ADMIN_PWD
+opcionales. Un id desconocido no crea nada: así la URL no sirve para
+llenar el disco de carpetas.
+"""
+import os
+import posixpath
+import re
+
+import streamlit as st
+
+EVENTO_DEFAULT = "default"
+EVENTOS_DIR = "eventos"
+
+# minúsculas, dígitos, guion y guion bajo: seguro como carpeta y como ruta del repo
+_ID = re.compile(r"[a-z0-9][a-z0-9_-]{0,39}")
+
+
+def secrets_section(nombre: str) -> dict:
+    """
+    Sección [nombre] de los secrets como dict. Vacía si no existe o si no hay
+    fichero de secrets (p. ej. en los benchmarks y al correr sin configurar).
+    """
+    try:
+        return dict(st.secrets.get(nombre, {}))
+    except FileNotFoundError:
+        return {}
+
+
+def eventos_config() -> dict:
+    return {k: dict(v) for k, v in secrets_section("eventos").items()}
+
+
+def evento_config(evento: str) -> dict:
+    """Sección [eventos.<id>] de los secrets (vacía si no hay)."""
+    return eventos_config().get(evento, {})
+
+
+def event_id(valor) -> str:
+    """
+    Id del evento pedido en la URL, o None si no es válido o no existe.
+    Sin valor devuelve el evento por defecto.
+    """
+    if not valor:
+        return EVENTO_DEFAULT
+    evento = str(valor).strip().lower()
+    if evento == EVENTO_DEFAULT:
+        return evento
+    if not _ID.fullmatch(evento):
+        return None
+    if evento in eventos_config() or os.path.isdir(os.path.join(EVENTOS_DIR, evento)):
+        return evento
+    return None
+
+
+def event_dir(evento: str = EVENTO_DEFAULT) -> str:
+    """Carpeta local de los datos del evento ('' para el evento por defecto)."""
+    return "" if evento == EVENTO_DEFAULT else os.path.join(EVENTOS_DIR, evento)
+
+
+def event_path(evento: str, nombre: str) -> str:
+    """Ruta local de un fichero de datos del evento; crea la carpeta si falta."""
+    carpeta = event_dir(evento)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    return os.path.join(carpeta, nombre)
+
+
+def repo_dir(evento: str = EVENTO_DEFAULT) -> str:
+    """Carpeta del evento dentro del repo de GitHub ('' = raíz)."""
+    return "" if evento == EVENTO_DEFAULT else posixpath.join(EVENTOS_DIR, evento)
+
+
+def repo_path(evento: str, nombre: str) -> str:
+    """Ruta en el repo de GitHub de un fichero de datos del evento."""
+    return posixpath.join(repo_dir(evento), nombre)
+
+
+def event_asset(evento: str, path: str) -> str:
+    """La imagen propia del evento si existe; si no, la compartida (path)."""
+    carpeta = event_dir(evento)
+    if carpeta:
+        propia = os.path.join(carpeta, path)
+        if os.path.exists(propia):
+            return propia
+    return path
+
+
+def event_name(evento: str) -> str:
+    """Nombre para mostrar: NOMBRE en los secrets o el id."""
+    return evento_config(evento).get("NOMBRE", evento)
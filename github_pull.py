@@ -0,0 +1,212 @@
+"""
+Sincronización de arranque desde GitHub.
+
+En hosting efímero el inscritos.csv local puede ser más viejo que la copia
+que el worker de github_sync mantiene en el repo. Al arrancar, el proceso
+descarga las dos copias remotas con la API de contenidos usando
+If-None-Match (un fichero sin cambios cuesta un 304 y no consume cuota) y
+las fusiona con el estado local registro a registro:
+
+- la clave es el celular canónico (categoría en categorias.csv)
+- la base de la fusión es la última copia remota ya fusionada, guardada junto
+  a su ETag en .github_cache/: un cambio hecho solo en un lado gana; si cambió en
+  los dos, gana GitHub; un alta nunca se pierde
+- sin base (primer arranque o caché borrada) es una unión; ante conflicto, GitHub
+
+La fusión se aplica a través del Storage, así vale para los dos backends.
+"""
+import io
+import os
+import posixpath
+import urllib.error
+import urllib.request
+from urllib.parse import quote
+
+import pandas as pd
+import streamlit as st
+
+from github_sync import BRANCH, REPO_NAME
+from metrics import span, timed
+from storage import FORMATO_FECHA, tipar_inscritos
+
+API_URL = "https://api.github.com"
+CACHE_DIR = ".github_cache"
+
+
+# --- DESCARGA CONDICIONAL ---
+def _leer(path: str):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _escribir(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def fetch_file(repo_name: str, path: str, token: str = None, branch: str = BRANCH,
+               api_url: str = API_URL, cache_dir: str = CACHE_DIR) -> tuple:
+    """
+    Descarga path de la rama con If-None-Match contra la copia en caché.
+    Devuelve (contenido remoto, copia anterior en caché, si hubo cambios, ETag);
+    contenido None si el fichero no existe en el repo.
+    No toca la caché: la copia nueva pasa a ser la base con save_base(), y
+    solo cuando la fusión se aplicó; si no, el siguiente arranque tomaría
+    por borrados locales los registros que solo estaban en GitHub.
+    """
+    copia = os.path.join(cache_dir, branch, path)
+    base = _leer(copia)
+    etag = _leer(copia + ".etag") if base is not None else None
+
+    req = urllib.request.Request(
+        f"{api_url}/repos/{repo_name}/contents/{quote(path)}?ref={quote(branch)}",
+        headers={
+            "Accept": "application/vnd.github.raw+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+            "User-Agent": "babyshower-app",
+        }
+    )
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+    if etag:
+        req.add_header("If-None-Match", etag.decode("ascii"))
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            data = resp.read()
+            nuevo_etag = resp.headers.get("ETag")
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return base, base, False, None
+        if e.code == 404:
+            return None, base, False, None
+        raise
+    return data, base, True, nuevo_etag
+
+
+def save_base(path: str, data: bytes, etag: str, branch: str = BRANCH, cache_dir: str = CACHE_DIR):
+    """Guarda data (y su ETag) como base de la próxima fusión de path."""
+    copia = os.path.join(cache_dir, branch, path)
+    _escribir(copia, data)
+    if etag:
+        _escribir(copia + ".etag", etag.encode("ascii"))
+    elif os.path.exists(copia + ".etag"):
+        os.remove(copia + ".etag")
+
+
+# --- FUSIÓN POR REGISTRO ---
+def merge_records(base: dict, local: dict, remoto: dict) -> dict:
+    """
+    Fusión a tres bandas de {clave: registro}. Un registro ausente vale None.
+    El orden del resultado es el remoto y detrás lo que solo existe en local.
+    """
+    resultado = {}
+    for clave in list(remoto) + [k for k in local if k not in remoto]:
+        b, l, r = base.get(clave), local.get(clave), remoto.get(clave)
+        if l == r or l == b:
+            valor = r          # iguales, o solo cambió en GitHub (incluye borrados)
+        elif r == b:
+            valor = l          # solo cambió en local
+        else:
+            valor = r if r is not None else l
+        if valor is not None:
+            resultado[clave] = valor
+    return resultado
+
+
+def _inscritos_por_celular(df: pd.DataFrame) -> dict:
+    if df is None or df.empty:
+        return {}
+    # los dos lados con los mismos tipos y luego como texto de CSV, para compararlos
+    df = tipar_inscritos(df)
+    df["Fecha"] = df["Fecha"].dt.strftime(FORMATO_FECHA)
+    df = df.astype(object).where(df.notna(), "").astype(str)
+    # si el CSV tuviera un celular repetido, se queda el último (como la consulta)
+    return {r["Celular"]: r for r in df.to_dict("records")}
+
+
+def _csv(data: bytes):
+    if not data:
+        return None
+    return pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)
+
+
+def _cupos(data: bytes) -> dict:
+    df = _csv(data)
+    return {} if df is None else dict(zip(df["Categoría"], df["Cupo total"]))
+
+
+@timed("arranque.fusion")
+def reconcile(store, remoto_csv: bytes, base_csv: bytes, remoto_cat: bytes, base_cat: bytes) -> dict:
+    """
+    Aplica al store la fusión entre el estado local y las copias de GitHub.
+    Devuelve los contadores de lo que cambió en local y si GitHub quedó atrás.
+    """
+    cambios = {"agregados": 0, "actualizados": 0, "eliminados": 0, "cupos": 0, "subir": False}
+    with store.transaction():
+        if remoto_cat:
+            local_cat = {c: str(v) for c, v in store.categorias().items()}
+            remoto = _cupos(remoto_cat)
+            fusion = merge_records(_cupos(base_cat), local_cat, remoto)
+            for categoria, cupo in fusion.items():
+                if local_cat.get(categoria) != cupo:
+                    store.set_cupo(categoria, int(cupo))
+                    cambios["cupos"] += 1
+            cambios["subir"] |= fusion != remoto
+
+        if remoto_csv:
+            local = _inscritos_por_celular(store.inscritos())
+            remoto = _inscritos_por_celular(_csv(remoto_csv))
+            fusion = merge_records(_inscritos_por_celular(_csv(base_csv)), local, remoto)
+            nuevos = [r for k, r in fusion.items() if k not in local]
+            for celular, registro in fusion.items():
+                if celular in local and local[celular] != registro:
+                    store.update_guest(celular, registro)
+                    cambios["actualizados"] += 1
+            for celular in local.keys() - fusion.keys():
+                store.delete_guest(celular)
+                cambios["eliminados"] += 1
+            # ya asignados en otro proceso: se respetan aunque aquí el cupo esté lleno
+            store.add_guests(nuevos, validar_cupo=False)
+            cambios["agregados"] = len(nuevos)
+            cambios["subir"] |= fusion.keys() != remoto.keys() or any(
+                fusion[k] != remoto[k] for k in fusion
+            )
+    return cambios
+
+
+@st.cache_resource(show_spinner="Sincronizando con GitHub…")
+def sync_on_startup(_store, token: str, repo_name: str = REPO_NAME, branch: str = BRANCH,
+                    api_url: str = API_URL, _push=None, repo_dir: str = "") -> dict:
+    """
+    Una vez por proceso y evento: trae las copias de GitHub y las fusiona con el store.
+    - _push: función a llamar si el estado fusionado tiene algo que GitHub no
+    - repo_dir: carpeta del evento en el repo ('' = raíz); es también la clave
+      de la caché, porque _store no forma parte de ella
+    Nunca lanza; si GitHub no responde, la app arranca con los datos locales.
+    """
+    try:
+        csv_path = posixpath.join(repo_dir, os.path.basename(_store.csv_file))
+        cat_path = posixpath.join(repo_dir, os.path.basename(_store.cat_file))
+        with span("arranque.descarga"):
+            remoto_csv, base_csv, cambio_csv, etag_csv = fetch_file(
+                repo_name, csv_path, token, branch, api_url)
+            remoto_cat, base_cat, cambio_cat, etag_cat = fetch_file(
+                repo_name, cat_path, token, branch, api_url)
+        resumen = reconcile(_store, remoto_csv, base_csv, remoto_cat, base_cat)
+        # la base avanza solo con la fusión ya aplicada (si reconcile falla, no)
+        if cambio_csv:
+            save_base(csv_path, remoto_csv, etag_csv, branch)
+        if cambio_cat:
+            save_base(cat_path, remoto_cat, etag_cat, branch)
+        resumen["sin_cambios_remotos"] = not (cambio_csv or cambio_cat)
+        if resumen["subir"] and _push is not None:
+            _push()
+        return resumen
+    except Exception as e:
+        return {"error": str(e)}
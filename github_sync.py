@@ -0,0 +1,358 @@
+"""
+Persistencia en GitHub fuera del hilo de la petición.
+
+Las subidas se encolan en un worker en segundo plano (hilo + cola) que:
+- agrupa varias actualizaciones pendientes del mismo fichero en un solo commit
+- sube juntos, en un solo commit (Git Data API), los ficheros que cambian a la vez
+- lee el contenido local en el momento de subirlo, así el commit lleva el último estado
+- no sube un fichero si su blob SHA coincide con el último que subió (guardado en disco)
+- reintenta con espera exponencial (máx. max_backoff) si GitHub falla, sin
+  descartar nunca un trabajo: un registro solo existe en GitHub cuando sube
+- al salir el proceso (atexit) intenta vaciar la cola durante EXIT_TIMEOUT
+"""
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+from events import EVENTO_DEFAULT
+from metrics import span
+
+REPO_NAME = "Gabri3l756/BabyShower"
+BRANCH = "main"
+
+# Segundos que el proceso espera al salir a que se suba lo pendiente
+EXIT_TIMEOUT = 20.0
+
+
+def git_blob_sha(data: bytes) -> str:
+    """SHA del objeto blob de git para ese contenido (el 'sha' que devuelve GitHub)."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def push_file(repo, local_path: str, repo_path: str, message: str, branch: str = BRANCH,
+              sha: str = None) -> str:
+    """
+    Sube o actualiza un fichero en el repo. Devuelve el blob SHA del contenido subido.
+    - repo: objeto con la interfaz de github.Repository (get_contents, update_file, create_file)
+    - sha: blob SHA remoto ya conocido; si se da, se ahorra el get_contents
+    """
+    # Leer contenido local
+    with open(local_path, "rb") as f:
+        data = f.read()
+    nuevo = git_blob_sha(data)
+
+    if sha is None:
+        try:
+            sha = repo.get_contents(repo_path, ref=branch).sha
+        except Exception:
+            # Si no existe, lo crea
+            repo.create_file(
+                path=repo_path,
+                message=message,
+                content=data.decode("utf-8"),
+                branch=branch
+            )
+            return nuevo
+    if sha != nuevo:
+        # Si ya existe y cambió, lo actualiza
+        repo.update_file(
+            path=repo_path,
+            message=message,
+            content=data.decode("utf-8"),
+            sha=sha,
+            branch=branch
+        )
+    return nuevo
+
+
+def push_files(repo, archivos: dict, message: str, branch: str = BRANCH) -> dict:
+    """
+    Sube varios ficheros en un solo commit con la Git Data API: árbol nuevo
+    sobre el del último commit de la rama, commit y avance de la rama.
+    - archivos: {repo_path: contenido en bytes}
+    Devuelve {repo_path: blob SHA subido}. Si el árbol no cambia, no hace commit.
+    """
+    from github import InputGitTreeElement
+
+    ref = repo.get_git_ref(f"heads/{branch}")
+    base = repo.get_git_commit(ref.object.sha)
+    tree = repo.create_git_tree(
+        [InputGitTreeElement(path, "100644", "blob", content=data.decode("utf-8"))
+         for path, data in archivos.items()],
+        base.tree
+    )
+    if tree.sha != base.tree.sha:
+        commit = repo.create_git_commit(message, tree, [base])
+        ref.edit(commit.sha)
+    return {path: git_blob_sha(data) for path, data in archivos.items()}
+
+
+class SyncWorker:
+    """
+    Cola write-behind de subidas a GitHub.
+    - repo_factory: función sin argumentos que devuelve el Repository (se llama
+      de forma perezosa y otra vez tras un error)
+    - backoff: segundos de espera del primer reintento (se duplica en cada fallo)
+    - max_backoff: espera máxima entre reintentos; un trabajo fallido se reintenta
+      indefinidamente
+    - batch_window: segundos que se espera a otros ficheros para subirlos en el mismo commit
+    - state_file: JSON donde se guarda el blob SHA subido por fichero (None: solo en memoria)
+    """
+
+    def __init__(self, repo_factory, branch: str = BRANCH, backoff: float = 2.0,
+                 max_backoff: float = 60.0, batch_window: float = 1.0, state_file: str = None):
+        self._repo_factory = repo_factory
+        self._repo = None
+        self.branch = branch
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.batch_window = batch_window
+        self.state_file = state_file
+        # repo_path -> blob SHA de lo último que se subió
+        self._pushed = self._load_state()
+
+        self._cond = threading.Condition()
+        # repo_path -> trabajo pendiente; OrderedDict para atender en orden de llegada
+        self._pending = OrderedDict()
+        self._busy = False
+        self._stopped = False
+
+        self.last_success = None
+        self.last_error = None
+        self.commits = 0
+        self.failures = 0
+        self.skipped = 0
+
+        self._thread = threading.Thread(target=self._run, name="github-sync", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, local_path: str, repo_path: str = None, message: str = None, prepare=None):
+        """
+        Encola la subida de local_path; si ya hay una pendiente del mismo fichero, se fusionan.
+        - prepare: función opcional que el worker llama justo antes de leer el fichero
+          (p. ej. DataStore.compact para volcar el diario de ediciones)
+        """
+        if repo_path is None:
+            repo_path = os.path.basename(local_path)
+        if message is None:
+            message = f"🤖 Actualizar {repo_path}"
+        with self._cond:
+            job = self._pending.get(repo_path)
+            if job is None:
+                self._pending[repo_path] = {
+                    "local_path": local_path,
+                    "message": message,
+                    "prepare": prepare,
+                    "cambios": 1,
+                    "intentos": 0,
+                    "not_before": 0.0,
+                }
+            else:
+                job["local_path"] = local_path
+                job["message"] = message
+                job["prepare"] = prepare or job["prepare"]
+                job["cambios"] += 1
+            self._cond.notify()
+
+    def status(self) -> dict:
+        """Estado para el panel de admin."""
+        with self._cond:
+            return {
+                "pendientes": len(self._pending) + (1 if self._busy else 0),
+                "ultimo_exito": self.last_success,
+                "ultimo_error": self.last_error,
+                "commits": self.commits,
+                "fallos": self.failures,
+                "omitidos": self.skipped,
+            }
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Bloquea hasta que la cola quede vacía. Devuelve False si vence el timeout."""
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._busy:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._cond.wait(restante)
+            return True
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Reintenta ya lo que esperaba su turno de backoff y espera a que la cola
+        quede vacía. Devuelve False si vence el timeout (lo pendiente sigue en cola).
+        """
+        with self._cond:
+            for job in self._pending.values():
+                job["not_before"] = 0.0
+            self._cond.notify_all()
+        return self.wait_idle(timeout)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    # --- ESTADO EN DISCO ---
+    def _load_state(self) -> dict:
+        if not self.state_file:
+            return {}
+        try:
+            with open(self.state_file, encoding="utf-8") as f:
+                estado = json.load(f)
+            return dict(estado.get(self.branch, {}))
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        if not self.state_file:
+            return
+        try:
+            with open(self.state_file, encoding="utf-8") as f:
+                estado = json.load(f)
+        except (OSError, ValueError):
+            estado = {}
+        estado[self.branch] = self._pushed
+        tmp = f"{self.state_file}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(estado, f, indent=2)
+        os.replace(tmp, self.state_file)
+
+    # --- HILO DEL WORKER ---
+    def _next_batch(self):
+        """Espera a que haya trabajos listos y saca de la cola todos los que lo estén."""
+        with self._cond:
+            while not self._stopped:
+                ahora = time.monotonic()
+                if any(j["not_before"] <= ahora for j in self._pending.values()):
+                    if self.batch_window > 0:
+                        # Dar tiempo a que lleguen los demás ficheros del mismo cambio
+                        limite = ahora + self.batch_window
+                        while not self._stopped and time.monotonic() < limite:
+                            self._cond.wait(limite - time.monotonic())
+                        ahora = time.monotonic()
+                    listos = [p for p, j in self._pending.items() if j["not_before"] <= ahora]
+                    self._busy = True
+                    return [(p, self._pending.pop(p)) for p in listos]
+                if self._pending:
+                    espera = min(j["not_before"] for j in self._pending.values()) - ahora
+                    self._cond.wait(espera)
+                else:
+                    self._cond.wait()
+            return None
+
+    def _run(self):
+        while True:
+            lote = self._next_batch()
+            if lote is None:
+                return
+            try:
+                commit, omitidos = self._push_batch(lote)
+            except Exception as e:
+                self._repo = None
+                for repo_path, job in lote:
+                    # el SHA remoto pudo cambiar por fuera: el reintento lo vuelve a consultar
+                    self._pushed.pop(repo_path, None)
+                    self._on_failure(repo_path, job, e)
+            else:
+                with self._cond:
+                    self.commits += commit
+                    self.skipped += omitidos
+                    self.last_success = time.time()
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _push_batch(self, lote: list) -> tuple:
+        """Sube los ficheros del lote que cambiaron. Devuelve (commits hechos, ficheros omitidos)."""
+        preparados = []
+        for _, job in lote:
+            if job["prepare"] is not None and job["prepare"] not in preparados:
+                with span("github.prepare"):
+                    job["prepare"]()
+                preparados.append(job["prepare"])
+
+        contenidos = {}
+        for repo_path, job in lote:
+            with open(job["local_path"], "rb") as f:
+                contenidos[repo_path] = f.read()
+        cambiados = {
+            p: data for p, data in contenidos.items() if git_blob_sha(data) != self._pushed.get(p)
+        }
+        omitidos = len(contenidos) - len(cambiados)
+        if not cambiados:
+            return 0, omitidos
+
+        jobs = dict(lote)
+        message = _mensaje([jobs[p] for p in cambiados], list(cambiados))
+        with span("github.push"):
+            if self._repo is None:
+                self._repo = self._repo_factory()
+            if len(cambiados) == 1:
+                (repo_path, _), = cambiados.items()
+                subidos = {repo_path: push_file(
+                    self._repo, jobs[repo_path]["local_path"], repo_path, message, self.branch,
+                    sha=self._pushed.get(repo_path)
+                )}
+            else:
+                subidos = push_files(self._repo, cambiados, message, self.branch)
+        self._pushed.update(subidos)
+        self._save_state()
+        return 1, omitidos
+
+    def _on_failure(self, repo_path: str, job: dict, error: Exception):
+        with self._cond:
+            self.failures += 1
+            self.last_error = f"{repo_path}: {error}"
+            job["intentos"] += 1
+            nuevo = self._pending.get(repo_path)
+            if nuevo is not None:
+                # Llegó otra actualización mientras tanto: esa ya lleva el contenido nuevo
+                nuevo["cambios"] += job["cambios"]
+                nuevo["prepare"] = nuevo["prepare"] or job["prepare"]
+                return
+            espera = min(self.max_backoff, self.backoff * 2 ** min(job["intentos"] - 1, 16))
+            job["not_before"] = time.monotonic() + espera
+            self._pending[repo_path] = job
+
+
+def _mensaje(jobs: list, paths: list) -> str:
+    """Mensaje de commit para uno o varios ficheros, con el total de cambios agrupados."""
+    mensajes = list(dict.fromkeys(j["message"] for j in jobs))
+    cambios = sum(j["cambios"] for j in jobs)
+    if len(mensajes) == 1:
+        message = mensajes[0]
+    else:
+        message = f"🤖 Actualizar {', '.join(paths)}"
+    if cambios > 1:
+        message = f"{message} ({cambios} cambios)"
+    if len(mensajes) > 1:
+        message += "\n\n" + "\n".join(f"- {m}" for m in mensajes)
+    return message
+
+
+@st.cache_resource
+def get_sync_worker(token: str, repo_name: str = REPO_NAME, evento: str = EVENTO_DEFAULT) -> SyncWorker:
+    """
+    Worker único por token/repo y evento, compartido por todas las sesiones.
+    Cada evento tiene su cola, sus reintentos y su estado: un evento con
+    GitHub fallando no retrasa las subidas de los demás.
+    """
+    def repo_factory():
+        from github import Github
+        return Github(token).get_repo(repo_name)
+    state_file = f".github_sync-{repo_name.replace('/', '_')}.json"
+    if evento != EVENTO_DEFAULT:
+        state_file = f".github_sync-{repo_name.replace('/', '_')}-{evento}.json"
+    worker = SyncWorker(repo_factory, state_file=state_file)
+    # el hilo es daemon: sin esto, un reinicio del contenedor perdería lo pendiente
+    atexit.register(worker.flush, EXIT_TIMEOUT)
+    return worker
@@ -0,0 +1,96 @@
+"""
+Variantes optimizadas de las imágenes de assets/.
+
+Los PNG originales pesan ~2 MB y se muestran a 400 px. Aquí se generan una
+sola vez versiones redimensionadas y comprimidas (JPEG si la imagen no usa
+transparencia, PNG optimizado si la usa) en assets/.cache, con el hash del
+original en el nombre: si el original cambia, se genera otra variante.
+
+Se entregan en JPEG/PNG y no en WebP porque st.image vuelve a codificar
+cualquier otro formato en cada llamada; con el ancho exacto de pantalla
+Streamlit sirve los bytes tal cual.
+
+Para generarlas en el build:  python images.py
+"""
+import functools
+import hashlib
+import os
+import threading
+
+CACHE_DIR = os.path.join("assets", ".cache")
+
+# Ancho con el que se muestran las imágenes de categoría
+ANCHO_CATEGORIA = 400
+# El banner ocupa el ancho del contenedor (máx. 600px en móvil, más en escritorio)
+ANCHO_BANNER = 1200
+JPEG_QUALITY = 82
+
+
+@functools.lru_cache(maxsize=64)
+def _source_hash(path: str, mtime_ns: int, size: int) -> str:
+    """sha1 del contenido; mtime y tamaño solo forman parte de la clave de la caché."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()[:12]
+
+
+def _usa_alpha(im) -> bool:
+    return im.mode in ("RGBA", "LA") and im.getchannel("A").getextrema()[0] < 255
+
+
+def _generar(src: str, dst: str, width: int):
+    from PIL import Image
+
+    with Image.open(src) as im:
+        im.load()
+        if im.width > width:
+            alto = round(im.height * width / im.width)
+            im = im.resize((width, alto), resample=Image.LANCZOS)
+        tmp = f"{dst}.{os.getpid()}-{threading.get_ident()}.tmp"
+        if dst.endswith(".png"):
+            im.save(tmp, format="PNG", optimize=True)
+        else:
+            im.convert("RGB").save(tmp, format="JPEG", quality=JPEG_QUALITY,
+                                   optimize=True, progressive=True)
+    # os.replace: dos sesiones generando la misma variante no dejan un fichero a medias
+    os.replace(tmp, dst)
+
+
+def optimized_path(src: str, width: int = ANCHO_CATEGORIA) -> str:
+    """
+    Ruta de la variante de src con el ancho dado; la genera si no existe.
+    Si Pillow falla con la imagen, devuelve el original.
+    """
+    try:
+        info = os.stat(src)
+        digest = _source_hash(src, info.st_mtime_ns, info.st_size)
+        base = os.path.splitext(os.path.basename(src))[0]
+        stem = os.path.join(CACHE_DIR, f"{base}-{width}w-{digest}")
+        for ext in (".jpg", ".png"):
+            if os.path.exists(stem + ext):
+                return stem + ext
+
+        from PIL import Image
+        with Image.open(src) as im:
+            ext = ".png" if _usa_alpha(im) else ".jpg"
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        _generar(src, stem + ext, width)
+        return stem + ext
+    except Exception:
+        return src
+
+
+def optimized_map(paths: dict, width: int = ANCHO_CATEGORIA) -> dict:
+    """Mismo diccionario {clave: ruta} con las rutas optimizadas."""
+    return {k: optimized_path(p, width) for k, p in paths.items()}
+
+
+if __name__ == "__main__":
+    for nombre in sorted(os.listdir("assets")):
+        if nombre.endswith(".png"):
+            src = os.path.join("assets", nombre)
+            ancho = ANCHO_BANNER if nombre == "banner.png" else ANCHO_CATEGORIA
+            dst = optimized_path(src, ancho)
+            print(f"{src} ({os.path.getsize(src) // 1024} KB) -> {dst} ({os.path.getsize(dst) // 1024} KB)")
@@ -0,0 +1,139 @@
+"""
+Instrumentación por fases (spans) para saber dónde se va el tiempo.
+
+    with span("registro.asignacion"):
+        ...
+
+    @timed("datos.carga")
+    def _load_inscritos(self): ...
+
+Cada fase guarda sus últimas duraciones en un buffer circular compartido por
+todo el proceso (sesiones y workers en segundo plano), con el que se calculan
+conteos y percentiles para el panel de Rendimiento del dashboard. Con
+[metrics] JSON_LOGS = true en los secrets, cada span se escribe además como
+una línea JSON en el log. Con ENABLED = false span() devuelve un contexto nulo
+y timed() llama directamente a la función.
+"""
+import functools
+import json
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+# Duraciones que se guardan por fase para los percentiles
+VENTANA = 500
+
+logger = logging.getLogger("babyshower.metrics")
+
+_NULO = nullcontext()
+
+
+def percentil(valores: list, p: float) -> float:
+    """Percentil por rango más cercano de una lista no vacía."""
+    orden = sorted(valores)
+    return orden[max(0, math.ceil(p / 100 * len(orden)) - 1)]
+
+
+class _Span:
+    __slots__ = ("tracer", "nombre", "t0")
+
+    def __init__(self, tracer, nombre: str):
+        self.tracer = tracer
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.nombre, time.perf_counter() - self.t0, ok=exc_type is None)
+        return False
+
+
+class Tracer:
+    """
+    Agregador de spans en memoria.
+    - window: duraciones recientes que se guardan por fase
+    """
+
+    def __init__(self, window: int = VENTANA):
+        self.window = window
+        self.enabled = True
+        self.json_logs = False
+        self._lock = threading.Lock()
+        self._fases = {}
+
+    def configure(self, enabled: bool = True, json_logs: bool = False):
+        self.enabled = enabled
+        self.json_logs = json_logs
+        if json_logs and not logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+    # --- MEDICIÓN ---
+    def span(self, nombre: str):
+        """Context manager que mide el bloque con el nombre de fase dado."""
+        if not self.enabled:
+            return _NULO
+        return _Span(self, nombre)
+
+    def timed(self, nombre: str):
+        """Decorador: mide cada llamada a la función como la fase `nombre`."""
+        def decorador(fn):
+            @functools.wraps(fn)
+            def envoltura(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _Span(self, nombre):
+                    return fn(*args, **kwargs)
+            return envoltura
+        return decorador
+
+    def record(self, nombre: str, segundos: float, ok: bool = True):
+        with self._lock:
+            fase = self._fases.get(nombre)
+            if fase is None:
+                fase = self._fases[nombre] = {
+                    "duraciones": deque(maxlen=self.window), "n": 0, "errores": 0
+                }
+            fase["duraciones"].append(segundos)
+            fase["n"] += 1
+            fase["errores"] += not ok
+        if self.json_logs:
+            logger.info(json.dumps({
+                "span": nombre, "ms": round(segundos * 1000, 3), "ok": ok,
+                "ts": round(time.time(), 3), "hilo": threading.current_thread().name,
+            }, ensure_ascii=False))
+
+    # --- CONSULTA ---
+    def stats(self) -> list:
+        """Una fila por fase: llamadas, errores y p50/p95/máx (ms) de la ventana."""
+        with self._lock:
+            fases = {n: (list(f["duraciones"]), f["n"], f["errores"]) for n, f in self._fases.items()}
+        filas = []
+        for nombre, (duraciones, n, errores) in sorted(fases.items()):
+            filas.append({
+                "Fase": nombre,
+                "Llamadas": n,
+                "Errores": errores,
+                "p50 ms": round(percentil(duraciones, 50) * 1000, 1),
+                "p95 ms": round(percentil(duraciones, 95) * 1000, 1),
+                "Máx ms": round(max(duraciones) * 1000, 1),
+            })
+        return filas
+
+    def reset(self):
+        with self._lock:
+            self._fases.clear()
+
+
+# Instancia del proceso: la usan la app, los stores y los workers
+TRACER = Tracer()
+span = TRACER.span
+timed = TRACER.timed
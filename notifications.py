@@ -0,0 +1,214 @@
+"""
+Notificaciones por correo a los anfitriones fuera del hilo de la petición.
+
+Un worker en segundo plano mantiene una única conexión SMTP autenticada
+(reconectando si se cae) y envía los avisos de la bandeja de salida. Si se
+configura una ventana de agrupación, los registros que llegan dentro de ella
+salen en un solo correo resumen.
+"""
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING
+
+import streamlit as st
+
+from metrics import span
+
+# smtplib/email solo se cargan cuando hay algo que enviar
+if TYPE_CHECKING:
+    from email.message import EmailMessage
+
+PLANTILLA_REGISTRO = """
+    • Nombre      : {Nombre}
+    • Celular     : {Celular}
+    • Categoría   : {Categoría}
+    • Acompañantes: {Acompañantes}
+    • Fecha       : {Fecha}
+"""
+
+
+def build_message(registros: list, sender: str, hosts: list, evento: str = None) -> "EmailMessage":
+    """
+    Construye el correo para uno o varios registros.
+    Cada registro debe tener llaves: Nombre, Celular, Categoría, Fecha, Acompañantes
+    - evento: nombre del evento, como prefijo del asunto (None = sin prefijo)
+    """
+    from email.message import EmailMessage
+
+    msg = EmailMessage()
+    msg["From"] = sender
+    msg["To"] = ", ".join(hosts)
+    prefijo = f"[{evento}] " if evento else ""
+    if len(registros) == 1:
+        msg["Subject"] = f"{prefijo}Nuevo registro: {registros[0]['Nombre']}"
+        intro = "Se ha registrado un nuevo invitado:"
+    else:
+        msg["Subject"] = f"{prefijo}{len(registros)} nuevos registros"
+        intro = f"Se han registrado {len(registros)} nuevos invitados:"
+    detalle = "".join(PLANTILLA_REGISTRO.format(**r) for r in registros)
+    msg.set_content(f"""
+    ¡Hola!
+
+    {intro}
+{detalle}
+    ¡Saludos!
+    """)
+    return msg
+
+
+class Outbox:
+    """
+    Bandeja de salida con conexión SMTP persistente.
+    - batch_window: segundos que se esperan para agrupar registros en un resumen (0 = uno por correo)
+    - starttls: usar STARTTLS tras el EHLO (desactivar para servidores locales de prueba)
+    - max_retries: intentos por correo antes de descartarlo
+    - evento: nombre del evento para el asunto (None en el evento por defecto)
+    """
+
+    def __init__(self, smtp_server: str, smtp_port: int, user: str, password: str, hosts: list,
+                 batch_window: float = 0.0, starttls: bool = True, max_retries: int = 3,
+                 evento: str = None):
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.user = user
+        self.password = password
+        self.hosts = list(hosts)
+        self.batch_window = batch_window
+        self.starttls = starttls
+        self.max_retries = max_retries
+        self.evento = evento
+
+        self._smtp = None
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._busy = False
+        self._stopped = False
+
+        self.sent = 0
+        self.last_success = None
+        self.last_error = None
+
+        self._thread = threading.Thread(target=self._run, name="smtp-outbox", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, registro: dict):
+        with self._cond:
+            self._queue.append(dict(registro))
+            self._cond.notify()
+
+    def status(self) -> dict:
+        with self._cond:
+            return {
+                "pendientes": len(self._queue) + (1 if self._busy else 0),
+                "enviados": self.sent,
+                "ultimo_exito": self.last_success,
+                "ultimo_error": self.last_error,
+            }
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Bloquea hasta que la bandeja quede vacía. Devuelve False si vence el timeout."""
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._busy:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._cond.wait(restante)
+            return True
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._disconnect()
+
+    # --- CONEXIÓN ---
+    def _connect(self):
+        import smtplib
+
+        smtp = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=30)
+        smtp.ehlo()
+        if self.starttls:
+            smtp.starttls()
+            smtp.ehlo()
+        if self.password:
+            smtp.login(self.user, self.password)
+        self._smtp = smtp
+
+    def _disconnect(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            pass
+        self._smtp = None
+
+    def _send(self, msg: "EmailMessage"):
+        """Envía reutilizando la conexión; si se cayó, reconecta una vez."""
+        import smtplib
+
+        if self._smtp is None:
+            self._connect()
+        try:
+            self._smtp.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self._disconnect()
+            self._connect()
+            self._smtp.send_message(msg)
+
+    # --- HILO DEL WORKER ---
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue and not self._stopped:
+                self._cond.wait()
+            if not self._queue:
+                return None
+            if self.batch_window > 0:
+                # Dejar que lleguen más registros dentro de la ventana
+                limite = time.monotonic() + self.batch_window
+                while not self._stopped and time.monotonic() < limite:
+                    self._cond.wait(limite - time.monotonic())
+            lote = list(self._queue) if self.batch_window > 0 else [self._queue[0]]
+            for _ in lote:
+                self._queue.popleft()
+            self._busy = True
+            return lote
+
+    def _run(self):
+        while True:
+            lote = self._next_batch()
+            if lote is None:
+                return
+            msg = build_message(lote, self.user, self.hosts, self.evento)
+            enviado = False
+            for intento in range(self.max_retries):
+                try:
+                    with span("correo.envio"):
+                        self._send(msg)
+                    enviado = True
+                    break
+                except Exception as e:
+                    self._disconnect()
+                    with self._cond:
+                        self.last_error = str(e)
+                    if intento + 1 < self.max_retries:
+                        time.sleep(2 ** intento)
+            with self._cond:
+                if enviado:
+                    self.sent += len(lote)
+                    self.last_success = time.time()
+                self._busy = False
+                self._cond.notify_all()
+
+@st.cache_resource
+def get_outbox(smtp_server: str, smtp_port: int, user: str, password: str, hosts: tuple,
+               batch_window: float = 0.0, starttls: bool = True, evento: str = None) -> Outbox:
+    """
+    Bandeja única por configuración y evento, compartida por todas las sesiones.
+    Un resumen agrupado nunca mezcla registros de dos eventos.
+    """
+    return Outbox(smtp_server, smtp_port, user, password, list(hosts), batch_window, starttls,
+                  evento=evento)
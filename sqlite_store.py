@@ -0,0 +1,295 @@
+"""
+Backend SQLite de la capa de datos.
+
+Misma interfaz que storage.DataStore, pero con concurrencia real: modo WAL,
+índice único sobre el celular, índice por categoría y el cupo comprobado por
+un trigger dentro de la transacción de inserción (salvo las filas que ya
+vienen asignadas: la importación inicial y la fusión con GitHub). La primera vez que se abre
+una base vacía importa inscritos.csv/categorias.csv; sync_csv() exporta de
+vuelta a CSV para la subida a GitHub.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+from metrics import span, timed
+from storage import (
+    CAT_FILE, CATEGORIAS_INICIALES, COLUMNAS, CSV_FILE, FORMATO_FECHA, Storage,
+    canonical_phone, format_fecha, registro_tipado, resumen_categorias,
+    tipar_inscritos, write_csv_atomic
+)
+
+DB_FILE = "babyshower.db"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS categorias (
+    categoria   TEXT PRIMARY KEY,
+    cupo        INTEGER NOT NULL,
+    orden       INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS inscritos (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre       TEXT NOT NULL,
+    celular      TEXT NOT NULL,
+    categoria    TEXT NOT NULL,
+    fecha        TEXT,
+    acompanantes INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_inscritos_celular ON inscritos (celular);
+CREATE INDEX IF NOT EXISTS ix_inscritos_categoria ON inscritos (categoria);
+"""
+
+# El cupo se valida en la misma transacción que inserta la fila
+TRIGGER_CUPO = """
+CREATE TRIGGER IF NOT EXISTS tr_inscritos_cupo
+BEFORE INSERT ON inscritos
+WHEN (SELECT COUNT(*) FROM inscritos WHERE categoria = NEW.categoria)
+     >= (SELECT cupo FROM categorias WHERE categoria = NEW.categoria)
+BEGIN
+    SELECT RAISE(ABORT, 'categoría sin cupo');
+END
+"""
+
+# columna SQL -> columna del DataFrame
+COLUMNAS_SQL = dict(zip(["nombre", "celular", "categoria", "fecha", "acompanantes"], COLUMNAS))
+
+
+class SqliteStore(Storage):
+    """
+    Repositorio sobre una base SQLite.
+    - db_file: ruta de la base (se crea e importa de los CSV si está vacía)
+    - csv_file / cat_file: CSV de importación inicial y de exportación
+    """
+
+    def __init__(self, db_file: str = DB_FILE, csv_file: str = CSV_FILE, cat_file: str = CAT_FILE):
+        self.db_file = db_file
+        self.csv_file = csv_file
+        self.cat_file = cat_file
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self._inscritos = None
+        self._data_version = None
+        self._version = 0
+        self._reader_conn = None
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(ESQUEMA)
+        conn.execute(TRIGGER_CUPO)
+        self.import_csv()
+
+    # --- CONEXIONES ---
+    def _conn(self) -> sqlite3.Connection:
+        """Una conexión por hilo; el commit lo gestiona transaction()."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE: bloquea escritores de otros hilos y procesos. Reentrante."""
+        conn = self._conn()
+        if self._local.depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        self._local.depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.execute("ROLLBACK")
+            raise
+        else:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.execute("COMMIT")
+
+    # --- LECTURA ---
+    def version(self) -> int:
+        """Sube cada vez que PRAGMA data_version indica un commit de otra conexión."""
+        with self._lock:
+            actual = self._reader().execute("PRAGMA data_version").fetchone()[0]
+            if actual != self._data_version:
+                self._data_version = actual
+                self._version += 1
+                self._inscritos = None
+            return self._version
+
+    def inscritos(self) -> pd.DataFrame:
+        """DataFrame cacheado hasta el siguiente cambio de version()."""
+        with self._lock:
+            self.version()
+            if self._inscritos is None:
+                with span("datos.carga"):
+                    df = pd.read_sql_query(
+                        f"SELECT {', '.join(COLUMNAS_SQL)} FROM inscritos ORDER BY id", self._reader()
+                    )
+                    self._inscritos = tipar_inscritos(df.rename(columns=COLUMNAS_SQL))
+            return self._inscritos
+
+    def _reader(self) -> sqlite3.Connection:
+        # conexión propia para vigilar data_version: cambia con los commits de las demás
+        if self._reader_conn is None:
+            self._reader_conn = sqlite3.connect(
+                self.db_file, timeout=30, isolation_level=None, check_same_thread=False
+            )
+        return self._reader_conn
+
+    def conteo(self) -> dict:
+        filas = self._conn().execute(
+            "SELECT categoria, COUNT(*) FROM inscritos GROUP BY categoria"
+        ).fetchall()
+        return dict(filas)
+
+    def resumen(self) -> dict:
+        conn = self._conn()
+        invitados, acomp = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(acompanantes), 0) FROM inscritos"
+        ).fetchone()
+        return {
+            "invitados": invitados,
+            "acompañantes": acomp,
+            "categorias": resumen_categorias(self.conteo(), self.categorias()),
+        }
+
+    def find_guest(self, celular):
+        fila = self._conn().execute(
+            f"SELECT {', '.join(COLUMNAS_SQL)} FROM inscritos WHERE celular = ?",
+            (canonical_phone(celular),)
+        ).fetchone()
+        return registro_tipado(dict(zip(COLUMNAS, fila))) if fila is not None else None
+
+    def has_guest(self, celular) -> bool:
+        return self._conn().execute(
+            "SELECT 1 FROM inscritos WHERE celular = ?", (canonical_phone(celular),)
+        ).fetchone() is not None
+
+    def categorias(self) -> dict:
+        filas = self._conn().execute(
+            "SELECT categoria, cupo FROM categorias ORDER BY orden"
+        ).fetchall()
+        return dict(filas)
+
+    # --- ESCRITURA ---
+    @timed("datos.alta")
+    def add_guest(self, registro: dict):
+        with self.transaction():
+            self._conn().execute(
+                "INSERT INTO inscritos (nombre, celular, categoria, fecha, acompanantes) "
+                "VALUES (?, ?, ?, ?, ?)",
+                _fila(registro)
+            )
+
+    @timed("datos.alta_lote")
+    def add_guests(self, registros: list, validar_cupo: bool = True):
+        """
+        Inserta el lote en una transacción; el trigger valida cada cupo salvo
+        con validar_cupo=False, que lo quita solo dentro de esta transacción.
+        """
+        with self.transaction():
+            conn = self._conn()
+            if not validar_cupo:
+                conn.execute("DROP TRIGGER tr_inscritos_cupo")
+            conn.executemany(
+                "INSERT INTO inscritos (nombre, celular, categoria, fecha, acompanantes) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [_fila(r) for r in registros]
+            )
+            if not validar_cupo:
+                conn.execute(TRIGGER_CUPO)
+
+    @timed("datos.edicion")
+    def update_guest(self, celular, registro: dict) -> pd.DataFrame:
+        with self.transaction():
+            self._conn().execute(
+                "UPDATE inscritos SET nombre = ?, celular = ?, categoria = ?, fecha = ?, "
+                "acompanantes = ? WHERE celular = ?",
+                _fila(registro) + (canonical_phone(celular),)
+            )
+        return self.inscritos()
+
+    @timed("datos.edicion")
+    def delete_guest(self, celular) -> pd.DataFrame:
+        with self.transaction():
+            self._conn().execute(
+                "DELETE FROM inscritos WHERE celular = ?", (canonical_phone(celular),)
+            )
+        return self.inscritos()
+
+    def set_cupo(self, categoria: str, cupo: int) -> dict:
+        with self.transaction():
+            # como en DataStore, una categoría nueva se añade al final
+            self._conn().execute(
+                "INSERT INTO categorias (categoria, cupo, orden) "
+                "VALUES (?, ?, (SELECT COALESCE(MAX(orden) + 1, 0) FROM categorias)) "
+                "ON CONFLICT(categoria) DO UPDATE SET cupo = excluded.cupo",
+                (categoria, int(cupo))
+            )
+        return self.categorias()
+
+    # --- IMPORTACIÓN / EXPORTACIÓN CSV ---
+    def import_csv(self):
+        """Carga los CSV existentes (o los cupos iniciales) si la base está vacía."""
+        if self.categorias():
+            return
+        if os.path.exists(self.cat_file):
+            df_cat = pd.read_csv(self.cat_file)
+            categorias = dict(zip(df_cat["Categoría"], df_cat["Cupo total"]))
+        else:
+            categorias = dict(CATEGORIAS_INICIALES)
+        if os.path.exists(self.csv_file) and os.path.getsize(self.csv_file) > 0:
+            df = tipar_inscritos(pd.read_csv(self.csv_file, dtype={"Celular": str}))
+            # si el CSV tenía un celular repetido, se queda el último (como la consulta)
+            df = df[~df["Celular"].duplicated(keep="last")]
+        else:
+            df = tipar_inscritos(pd.DataFrame(columns=COLUMNAS))
+
+        with self.transaction():
+            conn = self._conn()
+            if conn.execute("SELECT COUNT(*) FROM categorias").fetchone()[0]:
+                return  # otro proceso ya la importó
+            conn.executemany(
+                "INSERT INTO categorias (categoria, cupo, orden) VALUES (?, ?, ?)",
+                [(c, int(cupo), i) for i, (c, cupo) in enumerate(categorias.items())]
+            )
+            # la importación respeta lo ya asignado aunque supere un cupo reducido
+            conn.execute("DROP TRIGGER tr_inscritos_cupo")
+            conn.executemany(
+                "INSERT INTO inscritos (nombre, celular, categoria, fecha, acompanantes) "
+                "VALUES (?, ?, ?, ?, ?)",
+                zip(
+                    df["Nombre"].fillna("").tolist(),
+                    df["Celular"].tolist(),
+                    df["Categoría"].astype(object).tolist(),
+                    df["Fecha"].dt.strftime(FORMATO_FECHA).fillna("").tolist(),
+                    df["Acompañantes"].tolist(),
+                )
+            )
+            conn.execute(TRIGGER_CUPO)
+
+    @timed("datos.exportar_csv")
+    def sync_csv(self):
+        """Exporta inscritos.csv y categorias.csv para subirlos a GitHub."""
+        write_csv_atomic(self.inscritos(), self.csv_file)
+        write_csv_atomic(pd.DataFrame([
+            {"Categoría": c, "Cupo total": cupo}
+            for c, cupo in self.categorias().items()
+        ]), self.cat_file)
+
+
+def _fila(registro: dict) -> tuple:
+    registro = registro_tipado(registro)
+    return (
+        registro["Nombre"],
+        registro["Celular"],
+        registro["Categoría"],
+        format_fecha(registro["Fecha"]),
+        registro["Acompañantes"],
+    )
@@ -0,0 +1,704 @@
+"""
+Capa de datos de la app.
+
+Mantiene en memoria las tablas de inscritos y categorías, compartidas entre
+todas las sesiones de Streamlit, y solo vuelve a leer un CSV cuando su
+mtime/tamaño en disco cambia (p. ej. si alguien lo edita a mano). Las
+escrituras propias actualizan la copia en memoria directamente.
+
+La tabla de inscritos se tipa una sola vez al cargar (TIPOS): celular
+canónico como texto Arrow, categoría como category, fecha como datetime64 y
+acompañantes como int16. Así ocupa varias veces menos que con columnas
+object y las consultas y el dashboard no vuelven a convertir nada.
+
+inscritos.csv es de solo-añadir: cada registro nuevo es una línea con fsync.
+Las ediciones y borrados del admin van a un diario JSONL que se aplica al
+cargar. Cada entrada guarda cuántas filas tenía el CSV al escribirla y al
+recargar solo afecta a esas: un alta posterior con el mismo celular (tras un
+borrado o un cambio de celular) no hereda la edición.
+
+Una última línea sin salto es una escritura cortada por una caída: no se
+carga y la siguiente escritura la recorta (en el CSV y en el diario).
+compact() reescribe el CSV de forma atómica (fichero temporal + os.replace)
+y vacía el diario, así el CSV nunca queda a medio escribir.
+
+Storage define la interfaz común; DataStore (CSV) es el backend por defecto
+y sqlite_store.SqliteStore la alternativa, elegida con [storage] BACKEND en
+los secrets.
+"""
+import csv
+import io
+import json
+import os
+import threading
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from events import EVENTO_DEFAULT, event_path, secrets_section
+from metrics import span, timed
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo queda el lock del proceso
+    fcntl = None
+
+# inscritos() es una sola instancia compartida por todas las sesiones: con
+# copy-on-write, modificar lo que devuelve crea una copia y nunca la toca
+pd.set_option("mode.copy_on_write", True)
+
+# Rutas de persistencia
+CSV_FILE = "inscritos.csv"
+CAT_FILE = "categorias.csv"
+
+COLUMNAS = ["Nombre", "Celular", "Categoría", "Fecha", "Acompañantes"]
+
+# Tipos de las columnas de inscritos() en los dos backends
+TEXTO = pd.StringDtype("pyarrow")
+TIPOS = {
+    "Nombre": TEXTO,
+    "Celular": TEXTO,
+    "Categoría": "category",
+    "Fecha": "datetime64[ns]",
+    "Acompañantes": "int16",
+}
+FORMATO_FECHA = "%Y-%m-%d %H:%M"
+MAX_ACOMPANANTES = int(np.iinfo(np.int16).max)
+
+# Entradas del diario tras las que se compacta automáticamente
+COMPACT_EVERY = 50
+
+# Filas por página de los resultados de búsqueda
+POR_PAGINA = 25
+
+# Cupos con los que se crea categorias.csv si no existe
+CATEGORIAS_INICIALES = {
+    "Vestimenta": 5,
+    "Higiene y Baño": 5,
+    "Alimentación": 5,
+    "Juguetes y Estimulación": 5,
+    "Cambio de Pañal": 5,
+    "Hora de Dormir": 5
+}
+
+
+def _firma(path: str):
+    """Devuelve (mtime_ns, tamaño) del fichero, o None si no existe."""
+    try:
+        info = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (info.st_mtime_ns, info.st_size)
+
+
+def canonical_phone(valor) -> str:
+    """Celular como cadena de 10 dígitos: sin espacios, sin '+57' ni el '.0' de un float."""
+    texto = str(valor).strip()
+    if texto.endswith(".0"):
+        texto = texto[:-2]
+    digitos = "".join(ch for ch in texto if ch.isdigit())
+    if len(digitos) == 12 and digitos.startswith("57"):
+        digitos = digitos[2:]
+    return digitos
+
+
+def canonical_phones(serie: pd.Series) -> pd.Series:
+    """canonical_phone vectorizado sobre una columna entera (devuelve texto Arrow)."""
+    texto = serie.astype(TEXTO).fillna("").str.strip().str.replace(r"\.0$", "", regex=True)
+    digitos = texto.str.replace(r"\D", "", regex=True)
+    con_prefijo = (digitos.str.len() == 12) & digitos.str.startswith("57")
+    return digitos.mask(con_prefijo, digitos.str[2:])
+
+
+def _to_int(valor) -> int:
+    """Acompañantes como entero entre 0 y MAX_ACOMPANANTES; lo que no sea un número cuenta como 0."""
+    try:
+        return min(max(int(float(valor)), 0), MAX_ACOMPANANTES)
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+def parse_fecha(valor) -> pd.Timestamp:
+    """Fecha de un registro como Timestamp (NaT si falta o no se entiende)."""
+    if isinstance(valor, str):
+        try:
+            return pd.Timestamp(datetime.strptime(valor.strip(), FORMATO_FECHA))
+        except ValueError:
+            pass
+    fecha = pd.to_datetime(valor, errors="coerce")
+    return pd.NaT if fecha is None else fecha
+
+
+def parse_fechas(serie: pd.Series) -> pd.Series:
+    """parse_fecha vectorizado: el formato de la app primero y, para lo que no encaje, cualquiera."""
+    fechas = pd.to_datetime(serie, format=FORMATO_FECHA, errors="coerce")
+    resto = fechas.isna() & serie.notna() & (serie.astype(str).str.strip() != "")
+    if resto.any():
+        fechas[resto] = pd.to_datetime(serie[resto], format="mixed", errors="coerce")
+    return fechas
+
+
+def format_fecha(valor) -> str:
+    """Fecha como texto 'AAAA-MM-DD HH:MM', el formato de inscritos.csv ('' si falta)."""
+    if valor is None or valor is pd.NaT:
+        return ""
+    if isinstance(valor, str):
+        return valor
+    return valor.strftime(FORMATO_FECHA)
+
+
+def tipar_inscritos(df: pd.DataFrame) -> pd.DataFrame:
+    """Tabla de inscritos leída de CSV o SQLite con las columnas COLUMNAS y los tipos TIPOS."""
+    df = df.reindex(columns=COLUMNAS)
+    acomp = pd.to_numeric(df["Acompañantes"], errors="coerce").fillna(0)
+    return pd.DataFrame({
+        "Nombre": df["Nombre"].astype(TEXTO),
+        "Celular": canonical_phones(df["Celular"]),
+        "Categoría": df["Categoría"].astype("category"),
+        "Fecha": parse_fechas(df["Fecha"]),
+        "Acompañantes": acomp.clip(0, MAX_ACOMPANANTES).astype(TIPOS["Acompañantes"]),
+    })
+
+
+def registro_tipado(registro: dict) -> dict:
+    """Un registro con los tipos de una fila de inscritos() (celular canónico, Timestamp, int)."""
+    return {
+        "Nombre": str(registro["Nombre"]),
+        "Celular": canonical_phone(registro["Celular"]),
+        "Categoría": registro["Categoría"],
+        "Fecha": parse_fecha(registro["Fecha"]),
+        "Acompañantes": _to_int(registro["Acompañantes"]),
+    }
+
+
+def _concat_inscritos(df: pd.DataFrame, registros: list) -> pd.DataFrame:
+    """Añade registros tipados a la tabla sin que Categoría pierda el dtype category."""
+    nuevos = tipar_inscritos(pd.DataFrame(registros, columns=COLUMNAS))
+    categorias = df["Categoría"].cat.categories.union(nuevos["Categoría"].cat.categories)
+    partes = [
+        parte.assign(**{"Categoría": parte["Categoría"].cat.set_categories(categorias)})
+        for parte in (df, nuevos)
+    ]
+    return pd.concat(partes, ignore_index=True)
+
+
+def resumen_categorias(conteo: dict, categorias: dict) -> list:
+    """Filas Categoría / Cupo total / Asignadas / Disponibles, en el orden de categorias."""
+    return [
+        {
+            "Categoría": cat,
+            "Cupo total": cupo,
+            "Asignadas": conteo.get(cat, 0),
+            "Disponibles": max(0, cupo - conteo.get(cat, 0))
+        }
+        for cat, cupo in categorias.items()
+    ]
+
+
+def _fin_completo(f, tamano: int) -> int:
+    """
+    Bytes del fichero hasta su último salto de línea, incluido. Todas las
+    escrituras acaban en "\n": lo que quede detrás es una línea cortada por
+    una caída a mitad de escritura.
+    """
+    pos = tamano
+    while pos > 0:
+        paso = min(4096, pos)
+        f.seek(pos - paso)
+        i = f.read(paso).rfind(b"\n")
+        if i >= 0:
+            return pos - paso + i + 1
+        pos -= paso
+    return 0
+
+
+def _append_line(path: str, data: str, cabecera: str = ""):
+    """
+    Añade texto al final del fichero y hace fsync antes de volver. Una última
+    línea cortada se descarta antes; si el fichero queda vacío, se escribe
+    antes la cabecera.
+    """
+    raw = data.encode("utf-8")
+    with open(path, "ab+") as f:
+        tamano = f.seek(0, os.SEEK_END)
+        completo = _fin_completo(f, tamano)
+        if completo < tamano:
+            f.truncate(completo)
+        if completo == 0:
+            raw = cabecera.encode("utf-8") + raw
+        f.write(raw)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write_csv_atomic(df: pd.DataFrame, path: str):
+    """Escribe el CSV en un temporal y lo sustituye de golpe con os.replace."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        df.to_csv(f, index=False, lineterminator="\n", date_format=FORMATO_FECHA)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _normalizar(texto: str) -> str:
+    """Minúsculas y sin tildes: buscar 'maria' encuentra a 'María'."""
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii").lower()
+
+
+class GuestIndex:
+    """
+    Índice de búsqueda sobre una versión de la tabla de inscritos.
+    - df: salida de Storage.inscritos() (celulares ya canónicos)
+    - nombres normalizados (sin tildes, minúsculas) para buscar subcadenas
+    - celulares canónicos ordenados: un prefijo es un rango (búsqueda binaria)
+    - categorías con dtype category: filtrar compara códigos enteros
+    """
+
+    def __init__(self, df: pd.DataFrame, version: int):
+        self.version = version
+        self.df = df.reset_index(drop=True)
+        nombres = self.df["Nombre"].astype(TEXTO).fillna("").str.lower()
+        # solo los nombres con tildes pasan por la normalización Unicode
+        con_tildes = ~nombres.str.fullmatch(r"[\x00-\x7f]*").to_numpy(dtype=bool)
+        if con_tildes.any():
+            nombres[con_tildes] = (
+                nombres[con_tildes].str.normalize("NFKD").str.replace(r"[^\x00-\x7f]", "", regex=True)
+            )
+        self._nombres = nombres
+        self._celulares = self.df["Celular"].to_numpy(dtype=str)
+        self._orden = np.argsort(self._celulares, kind="stable")
+        self._ordenados = self._celulares[self._orden]
+        self._categorias = self.df["Categoría"]
+
+    def search(self, texto: str = "", categoria: str = None) -> pd.DataFrame:
+        """Filas cuyo nombre contiene `texto` (o cuyo celular empieza por él) y de esa categoría."""
+        mask = np.ones(len(self.df), dtype=bool)
+        texto = texto.strip()
+        if texto:
+            digitos = "".join(ch for ch in texto if ch.isdigit())
+            if digitos and not any(ch.isalpha() for ch in texto):
+                if texto.startswith("+57"):
+                    digitos = digitos[2:]
+                # ':' va justo después de '9': [digitos, digitos + ':') son los que empiezan así
+                desde = np.searchsorted(self._ordenados, digitos, side="left")
+                hasta = np.searchsorted(self._ordenados, digitos + ":", side="left")
+                prefijo = np.zeros(len(self.df), dtype=bool)
+                prefijo[self._orden[desde:hasta]] = True
+                mask &= prefijo
+            else:
+                buscado = _normalizar(texto)
+                mask &= self._nombres.str.contains(buscado, regex=False).to_numpy(dtype=bool)
+        if categoria:
+            mask &= (self._categorias == categoria).to_numpy(dtype=bool)
+        return self.df[mask]
+
+
+class Storage(ABC):
+    """
+    Interfaz de los backends de datos. csv_file y cat_file son siempre las
+    rutas de los CSV que se suben a GitHub; sync_csv() los deja al día.
+    """
+    csv_file: str
+    cat_file: str
+
+    @abstractmethod
+    def transaction(self):
+        """Context manager de exclusión mutua para leer-decidir-escribir."""
+
+    @abstractmethod
+    def version(self) -> int:
+        """Número que crece con cada cambio de datos (propio o de otro proceso)."""
+
+    @abstractmethod
+    def inscritos(self) -> pd.DataFrame:
+        """Tabla de invitados con las columnas COLUMNAS y los tipos TIPOS (compartida, solo lectura)."""
+
+    @abstractmethod
+    def conteo(self) -> dict:
+        """{categoría: asignadas}"""
+
+    @abstractmethod
+    def resumen(self) -> dict:
+        """
+        Métricas del dashboard sin recorrer la tabla:
+        {"invitados": int, "acompañantes": int, "categorias": resumen_categorias(...)}
+        """
+
+    @abstractmethod
+    def find_guest(self, celular):
+        """Registro del invitado con ese celular (tipado como registro_tipado), o None."""
+
+    @abstractmethod
+    def has_guest(self, celular) -> bool:
+        pass
+
+    @abstractmethod
+    def categorias(self) -> dict:
+        """{categoría: cupo total}"""
+
+    @abstractmethod
+    def add_guest(self, registro: dict):
+        pass
+
+    @abstractmethod
+    def add_guests(self, registros: list, validar_cupo: bool = True):
+        """
+        Añade varios registros con una sola escritura.
+        - validar_cupo: False para filas ya asignadas en otro sitio (la fusión
+          con GitHub), que se respetan aunque la categoría esté llena aquí
+        """
+
+    @abstractmethod
+    def update_guest(self, celular, registro: dict) -> pd.DataFrame:
+        pass
+
+    @abstractmethod
+    def delete_guest(self, celular) -> pd.DataFrame:
+        pass
+
+    @abstractmethod
+    def set_cupo(self, categoria: str, cupo: int) -> dict:
+        pass
+
+    @abstractmethod
+    def sync_csv(self):
+        """Vuelca el estado actual a csv_file/cat_file antes de subirlos."""
+
+    @timed("datos.busqueda")
+    def search(self, texto: str = "", categoria: str = None, pagina: int = 0,
+               por_pagina: int = POR_PAGINA) -> tuple:
+        """
+        Busca por subcadena del nombre, prefijo del celular y categoría.
+        Devuelve (DataFrame con la página pedida, total de coincidencias).
+        El índice se reconstruye solo cuando cambia version().
+        """
+        resultado = self._guest_index().search(texto, categoria)
+        inicio = pagina * por_pagina
+        return resultado.iloc[inicio:inicio + por_pagina], len(resultado)
+
+    def known_phones(self) -> np.ndarray:
+        """Celulares canónicos ya registrados (para validar lotes sin recorrer la tabla)."""
+        return self._guest_index()._celulares
+
+    def _guest_index(self) -> GuestIndex:
+        version = self.version()
+        indice = getattr(self, "_indice", None)
+        if indice is None or indice.version != version:
+            with span("datos.indice"):
+                indice = self._indice = GuestIndex(self.inscritos(), version)
+        return indice
+
+
+class DataStore(Storage):
+    """
+    Repositorio en memoria de inscritos.csv y categorias.csv.
+    - inscritos(): DataFrame tipado (TIPOS) y compartido, de solo lectura
+    - categorias(): copia del diccionario {categoría: cupo total}
+    - conteo(): {categoría: asignadas}, mantenido en cada escritura
+    - resumen(): totales y cupos por categoría a partir de esos contadores
+    - version(): se incrementa en cada escritura o recarga desde disco
+    - find_guest / has_guest: búsqueda O(1) por celular normalizado
+    - add_guest / update_guest / delete_guest / set_cupo: escriben a disco
+      y dejan la copia en memoria al día sin volver a leer el fichero
+    - compact(): vuelca el diario de ediciones en inscritos.csv
+    - transaction(): lock del proceso + lock de fichero (fcntl) para
+      secuencias leer-decidir-escribir entre sesiones y procesos
+    """
+
+    def __init__(self, csv_file: str = CSV_FILE, cat_file: str = CAT_FILE):
+        self.csv_file = csv_file
+        self.cat_file = cat_file
+        self.journal_file = csv_file + ".journal.jsonl"
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._tx_depth = 0
+        self._inscritos = None
+        self._nuevos = []  # filas añadidas aún no incorporadas al DataFrame
+        self._journal_len = 0
+        self._filas_csv = 0  # filas de datos en inscritos.csv (las entradas del diario lo guardan)
+        self._conteo = Counter()
+        self._total_invitados = 0
+        self._total_acomp = 0
+        self._por_celular = {}  # celular normalizado -> registro
+        self._firma_inscritos = None
+        self._version = 0
+        self._categorias = None
+        self._firma_categorias = None
+
+    @contextmanager
+    def transaction(self):
+        """Exclusión mutua entre hilos y, si hay fcntl, entre procesos. Reentrante."""
+        with self._lock:
+            if self._tx_depth == 0 and fcntl is not None:
+                self._lock_file = open(self.csv_file + ".lock", "a")
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._tx_depth += 1
+            try:
+                yield self
+            finally:
+                self._tx_depth -= 1
+                if self._tx_depth == 0 and self._lock_file is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    # --- LECTURA ---
+    def _firma_disco(self):
+        return (_firma(self.csv_file), _firma(self.journal_file))
+
+    def _sync(self):
+        """Recarga desde disco solo si el CSV o el diario cambiaron por fuera."""
+        firma = self._firma_disco()
+        if self._inscritos is None or firma != self._firma_inscritos:
+            self._load_inscritos()
+            self._firma_inscritos = firma
+
+    def version(self) -> int:
+        with self._lock:
+            self._sync()
+            self.categorias()
+            return self._version
+
+    def inscritos(self) -> pd.DataFrame:
+        with self._lock:
+            self._sync()
+            if self._nuevos:
+                self._inscritos = _concat_inscritos(self._inscritos, self._nuevos)
+                self._nuevos = []
+            return self._inscritos
+
+    @timed("datos.carga")
+    def _load_inscritos(self):
+        fuente = None
+        if os.path.exists(self.csv_file):
+            with open(self.csv_file, "rb") as f:
+                tamano = f.seek(0, os.SEEK_END)
+                completo = _fin_completo(f, tamano)
+                if completo == tamano:
+                    fuente = self.csv_file if tamano else None
+                elif completo:
+                    # sin la línea cortada: la próxima alta la recorta también en disco
+                    f.seek(0)
+                    fuente = io.BytesIO(f.read(completo))
+        if fuente is not None:
+            df = pd.read_csv(fuente, dtype={"Celular": str, "Categoría": "category"})
+        else:
+            df = pd.DataFrame(columns=COLUMNAS)
+        df = tipar_inscritos(df)
+        self._filas_csv = len(df)
+        # el índice es aún la posición de la fila en el CSV
+        entradas = self._journal_entries()
+        for entrada in entradas:
+            df = _apply_entry(df, entrada, entrada.get("filas"))
+        self._inscritos = df
+        self._nuevos = []
+        self._journal_len = len(entradas)
+        self._conteo = Counter({c: n for c, n in df["Categoría"].value_counts().items() if n})
+        self._version += 1
+        self._total_invitados = len(df)
+        self._total_acomp = int(df["Acompañantes"].sum())
+        # por columnas: to_dict("records") es varias veces más lento con 100k filas
+        columnas = [df[c].tolist() for c in COLUMNAS]
+        self._por_celular = {fila[1]: dict(zip(COLUMNAS, fila)) for fila in zip(*columnas)}
+
+    def _journal_entries(self) -> list:
+        if not os.path.exists(self.journal_file):
+            return []
+        entradas = []
+        with open(self.journal_file, encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    entradas.append(json.loads(linea))
+                except ValueError:
+                    # línea cortada por una caída a mitad de escritura
+                    continue
+        return entradas
+
+    def conteo(self) -> dict:
+        with self._lock:
+            self._sync()
+            return dict(self._conteo)
+
+    def resumen(self) -> dict:
+        with self._lock:
+            self._sync()
+            return {
+                "invitados": self._total_invitados,
+                "acompañantes": self._total_acomp,
+                "categorias": resumen_categorias(self._conteo, self.categorias()),
+            }
+
+    def find_guest(self, celular):
+        with self._lock:
+            self._sync()
+            registro = self._por_celular.get(canonical_phone(celular))
+            return dict(registro) if registro is not None else None
+
+    def has_guest(self, celular) -> bool:
+        with self._lock:
+            self._sync()
+            return canonical_phone(celular) in self._por_celular
+
+    def categorias(self) -> dict:
+        with self._lock:
+            firma = _firma(self.cat_file)
+            if firma is None:
+                # guardar inicial
+                self._write_categorias(dict(CATEGORIAS_INICIALES))
+            elif self._categorias is None or firma != self._firma_categorias:
+                df_cat = pd.read_csv(self.cat_file)
+                self._categorias = dict(zip(df_cat["Categoría"], df_cat["Cupo total"]))
+                self._firma_categorias = firma
+                self._version += 1
+            return dict(self._categorias)
+
+    # --- ESCRITURA ---
+    @timed("datos.alta")
+    def add_guest(self, registro: dict):
+        """Añade una línea al final de inscritos.csv (O(1), con fsync)."""
+        self._append_guests([registro])
+
+    @timed("datos.alta_lote")
+    def add_guests(self, registros: list, validar_cupo: bool = True):
+        """
+        Añade todas las líneas del lote con una sola escritura y un solo fsync.
+        El cupo de los CSV lo comprueba AssignmentService, no el store.
+        """
+        if registros:
+            self._append_guests(registros)
+
+    def _append_guests(self, registros: list):
+        with self.transaction():
+            self._sync()
+            buf = io.StringIO()
+            writer = csv.writer(buf, lineterminator="\n")
+            filas = [registro_tipado(registro) for registro in registros]
+            writer.writerows(
+                [f["Nombre"], f["Celular"], f["Categoría"], format_fecha(f["Fecha"]), f["Acompañantes"]]
+                for f in filas
+            )
+            _append_line(self.csv_file, buf.getvalue(), cabecera=",".join(COLUMNAS) + "\n")
+            for fila in filas:
+                self._nuevos.append(fila)
+                self._por_celular[fila["Celular"]] = fila
+                self._conteo[fila["Categoría"]] += 1
+                self._total_invitados += 1
+                self._total_acomp += fila["Acompañantes"]
+            self._filas_csv += len(filas)
+            self._version += 1
+            self._firma_inscritos = self._firma_disco()
+
+    def update_guest(self, celular, registro: dict) -> pd.DataFrame:
+        registro = dict(registro, Celular=str(registro["Celular"]))
+        return self._log_entry({"op": "update", "Celular": str(celular), "registro": registro})
+
+    def delete_guest(self, celular) -> pd.DataFrame:
+        return self._log_entry({"op": "delete", "Celular": str(celular)})
+
+    @timed("datos.edicion")
+    def _log_entry(self, entrada: dict) -> pd.DataFrame:
+        """Registra una edición en el diario y la aplica a la copia en memoria."""
+        with self.transaction():
+            df = self.inscritos()
+            entrada = dict(entrada, filas=self._filas_csv)
+            _append_line(self.journal_file, json.dumps(entrada, ensure_ascii=False, default=str) + "\n")
+            mask = (df["Celular"] == canonical_phone(entrada["Celular"])).to_numpy(dtype=bool)
+            afectados = int(mask.sum())
+            self._conteo.subtract(df.loc[mask, "Categoría"].dropna())
+            self._total_invitados -= afectados
+            self._total_acomp -= int(df.loc[mask, "Acompañantes"].sum())
+            df = _apply_entry(df, entrada)
+            self._por_celular.pop(canonical_phone(entrada["Celular"]), None)
+            if entrada["op"] == "update":
+                fila = registro_tipado(entrada["registro"])
+                self._conteo[fila["Categoría"]] += afectados
+                self._total_invitados += afectados
+                self._total_acomp += afectados * fila["Acompañantes"]
+                if afectados:
+                    self._por_celular[fila["Celular"]] = fila
+            self._inscritos = df
+            self._version += 1
+            self._journal_len += 1
+            self._firma_inscritos = self._firma_disco()
+            if self._journal_len >= COMPACT_EVERY:
+                self.compact()
+            return df
+
+    @timed("datos.compactar")
+    def compact(self):
+        """Reescribe inscritos.csv con el estado actual y vacía el diario."""
+        with self.transaction():
+            df = self.inscritos()
+            if not os.path.exists(self.journal_file):
+                return
+            write_csv_atomic(df, self.csv_file)
+            os.remove(self.journal_file)
+            self._journal_len = 0
+            self._filas_csv = len(df)
+            self._firma_inscritos = self._firma_disco()
+
+    def sync_csv(self):
+        # categorias.csv ya se escribe completo en cada cambio
+        self.compact()
+
+    def set_cupo(self, categoria: str, cupo: int) -> dict:
+        with self.transaction():
+            categorias = self.categorias()
+            categorias[categoria] = cupo
+            self._write_categorias(categorias)
+            return dict(categorias)
+
+    def _write_categorias(self, categorias: dict):
+        write_csv_atomic(pd.DataFrame([
+            {"Categoría": c, "Cupo total": categorias[c]}
+            for c in categorias
+        ]), self.cat_file)
+        self._categorias = categorias
+        self._firma_categorias = _firma(self.cat_file)
+        self._version += 1
+
+
+def _apply_entry(df: pd.DataFrame, entrada: dict, limite: int = None) -> pd.DataFrame:
+    """
+    Aplica una entrada del diario (update/delete por celular) a una copia de df.
+    - limite: solo a las filas con índice (posición en el CSV) menor; None = a todas
+    """
+    mask = (df["Celular"] == canonical_phone(entrada["Celular"])).to_numpy(dtype=bool)
+    if limite is not None:
+        mask &= df.index.to_numpy() < limite
+    if entrada["op"] == "delete":
+        return df[~mask]
+    fila = registro_tipado(entrada["registro"])
+    df = df.copy()
+    if pd.notna(fila["Categoría"]) and fila["Categoría"] not in df["Categoría"].cat.categories:
+        df["Categoría"] = df["Categoría"].cat.add_categories([fila["Categoría"]])
+    for columna in COLUMNAS:
+        df.loc[mask, columna] = fila[columna]
+    return df
+
+
+@st.cache_resource
+def get_store(evento: str = EVENTO_DEFAULT) -> Storage:
+    """
+    Instancia única del repositorio de un evento, compartida por todas las sesiones.
+    Cada evento tiene sus ficheros (ver events.py) y se carga la primera vez
+    que se pide, no al arrancar.
+    Con [storage] BACKEND = "sqlite" (y opcionalmente DB_FILE) en los secrets
+    usa SQLite; si no, los CSV.
+    """
+    config = secrets_section("storage")
+    csv_file, cat_file = event_path(evento, CSV_FILE), event_path(evento, CAT_FILE)
+    if config.get("BACKEND", "csv") == "sqlite":
+        from sqlite_store import DB_FILE, SqliteStore
+        db_file = config.get("DB_FILE", DB_FILE)
+        if evento != EVENTO_DEFAULT:
+            db_file = event_path(evento, os.path.basename(db_file))
+        return SqliteStore(db_file, csv_file, cat_file)
+    return DataStore(csv_file, cat_file)